@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark: convert_value vs. the try/except conversion it replaced.
+
+Run: python benchmark_convert_value.py
+"""
+
+import random
+import time
+
+from ubiquerg import convert_value, convert_values
+
+
+def convert_by_trial(val):
+    """The previous convert_value string handling: try int(), then float()."""
+    if val == "None":
+        return None
+    if val.lower() == "true":
+        return True
+    if val.lower() == "false":
+        return False
+    try:
+        return int(val)
+    except ValueError:
+        try:
+            return float(val)
+        except ValueError:
+            return val
+
+
+def make_inputs(n, seed=0):
+    """Mixed annotation-table cells: words, ints, floats, booleans and None."""
+    rng = random.Random(seed)
+    makers = [
+        lambda: f"sample_{rng.randint(0, 10**6)}",
+        lambda: rng.choice(["ATAC-seq", "RNA-seq", "hg38", "mm10", "paired", "single"]),
+        lambda: str(rng.randint(0, 10**9)),
+        lambda: f"{rng.random() * 100:.4f}",
+        lambda: rng.choice(["True", "false", "None"]),
+    ]
+    return [rng.choice(makers)() for _ in range(n)]
+
+
+def make_repeated_inputs(n, seed=0):
+    """Cells of a column of categories and small counts, which repeat."""
+    rng = random.Random(seed)
+    levels = ["ATAC-seq", "RNA-seq", "True", "false"] + [str(i) for i in range(100)]
+    return [rng.choice(levels) for _ in range(n)]
+
+
+def time_it(fun, values, repeats=5):
+    """Best of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fun(values)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = 200_000
+
+    print("ubiquerg convert_value benchmark")
+    print("=" * 50)
+    for label, values in [("mixed", make_inputs(n)), ("repeated", make_repeated_inputs(n))]:
+        print(f"\n{n} {label} values")
+        print("-" * 50)
+        results = [
+            ("try/except", time_it(lambda vs: [convert_by_trial(v) for v in vs], values)),
+            ("convert_value", time_it(lambda vs: [convert_value(v) for v in vs], values)),
+            ("convert_values", time_it(convert_values, values)),
+        ]
+        baseline = results[0][1]
+        for name, elapsed in results:
+            rate = n / elapsed / 1e6
+            print(
+                f"   {name:<15} {elapsed:.4f}s  ({rate:.2f}M values/s, {baseline / elapsed:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
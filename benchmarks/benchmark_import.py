@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark: cost of importing ubiquerg, measured with -X importtime.
+
+Run: python benchmark_import.py [--max-ms MS]
+
+Exits with status 1 if the median cost of a bare `import ubiquerg` exceeds
+--max-ms, so it can guard against import-time regressions.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import ubiquerg": "import ubiquerg",
+    "from ubiquerg import is_url": "from ubiquerg import is_url",
+    "from ubiquerg import mkabs": "from ubiquerg import mkabs",
+    "all exports": "import ubiquerg; [getattr(ubiquerg, n) for n in ubiquerg.__all__]",
+}
+
+
+def import_time_us(code):
+    """Total microseconds spent importing in a fresh interpreter, per -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        name = fields[2]
+        if not name.startswith(" ") or name.startswith("  "):
+            continue  # only count top-level imports, whose cumulative time includes the rest
+        try:
+            total += int(fields[1])
+        except ValueError:
+            continue  # header line
+    return total
+
+
+def startup_baseline_us(repeats):
+    """Import time of an interpreter that imports nothing, to subtract from each scenario."""
+    return statistics.median(import_time_us("pass") for _ in range(repeats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=15, help="fresh interpreters per scenario")
+    parser.add_argument("--max-ms", type=float, help="fail if bare `import ubiquerg` takes longer")
+    args = parser.parse_args()
+
+    baseline = startup_baseline_us(args.repeats)
+    print("ubiquerg import-time benchmark")
+    print("=" * 50)
+    print(f"median of {args.repeats} runs, interpreter startup imports subtracted\n")
+    results = {}
+    for label, code in SCENARIOS.items():
+        times = [import_time_us(code) - baseline for _ in range(args.repeats)]
+        results[label] = statistics.median(times) / 1000
+        print(f"   {label:<30} {results[label]:7.2f}ms")
+
+    bare = results["import ubiquerg"]
+    if args.max_ms is not None and bare > args.max_ms:
+        print(f"\n`import ubiquerg` took {bare:.2f}ms, over the {args.max_ms}ms limit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
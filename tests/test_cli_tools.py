@@ -1,10 +1,14 @@
 """Tests for CLI tools"""
 
 import argparse
+import math
+import random
+import sys
+from array import array
 
 import pytest
 
-from ubiquerg import VersionInHelpParser, convert_value
+from ubiquerg import VersionInHelpParser, convert_value, convert_values
 
 
 def build_parser():
@@ -334,3 +338,222 @@ def test_arg_defaults_unique_includes_all_subcommands():
 )
 def test_value_conversion(input, output):
     assert convert_value(input) == output
+
+
+def _convert_by_trial(val):
+    """Reference semantics: the try-int-then-float conversion convert_value has always had."""
+    if val == "None":
+        return None
+    if val.lower() == "true":
+        return True
+    if val.lower() == "false":
+        return False
+    try:
+        return int(val)
+    except ValueError:
+        try:
+            return float(val)
+        except ValueError:
+            return val
+
+
+CONVERSION_CASES = [
+    "",
+    " ",
+    "None",
+    "none",
+    "TRUE",
+    "fAlse",
+    "truth",
+    "1",
+    "-1",
+    "+0",
+    " 7 ",
+    "007",
+    "1_000",
+    "1__0",
+    "_1",
+    "1_",
+    "0x1f",
+    "1.",
+    ".5",
+    ".",
+    "-.5e-3",
+    "1e5",
+    "1E+05",
+    "1e",
+    "e5",
+    "1.5_0",
+    "1_0.5",
+    "1e1_0",
+    "inf",
+    "-Infinity",
+    "infinit",
+    "NaN",
+    "+nan",
+    "nan1",
+    "\t2.5\n",
+    "12\x1f",
+    "\x1c3",
+    "nan\t\x1c",
+    "1.5\x1e ",
+    "\u20034\u3000",
+    "\u0663\u0664",
+    "\uff11\uff12",
+    "1 2",
+    "sample_A",
+    "-",
+    "+",
+    "1" * 5000,
+]
+
+
+def _same(x, y):
+    if isinstance(x, float) and math.isnan(x):
+        return isinstance(y, float) and math.isnan(y)
+    return type(x) is type(y) and x == y
+
+
+@pytest.mark.parametrize("val", CONVERSION_CASES)
+def test_convert_values_matches_trial_conversion(val):
+    assert _same(convert_values([val])[0], _convert_by_trial(val))
+
+
+@pytest.mark.parametrize("val", CONVERSION_CASES + ["ninety", "Infinite", "x1", "\u00bd"])
+def test_convert_value_matches_trial_conversion(val):
+    assert _same(convert_value(val), _convert_by_trial(val))
+
+
+def test_convert_values_random_strings():
+    rng = random.Random(0)
+    chars = "0123456789_.eE+-  infatINF"
+    vals = ["".join(rng.choices(chars, k=rng.randint(1, 6))) for _ in range(5000)]
+    for val, obs in zip(vals, convert_values(vals)):
+        assert _same(obs, _convert_by_trial(val)), val
+        assert _same(convert_value(val), obs), val
+
+
+@pytest.mark.parametrize("space", [chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()])
+def test_convert_value_whitespace_matches_trial_conversion(space):
+    for val in (f"{space}1", f"2.5{space}", f"{space}inf{space}"):
+        assert _same(convert_value(val), _convert_by_trial(val)), repr(val)
+        assert _same(convert_values([val])[0], _convert_by_trial(val)), repr(val)
+
+
+@pytest.mark.parametrize("repeated_first", [True, False])
+def test_convert_values_with_and_without_memo(repeated_first):
+    distinct = [str(i) for i in range(3000)] + ["x{}".format(i) for i in range(3000)]
+    repeated = ["1", "2.5", "True", "word", None] * 600
+    vals = repeated + distinct if repeated_first else distinct + repeated
+    assert convert_values(vals) == [convert_value(v) for v in vals]
+
+
+def test_convert_values_non_strings():
+    assert convert_values([None, 1, 2.5, True, b"x"]) == [None, 1, 2.5, True, "b'x'"]
+
+
+@pytest.mark.parametrize(
+    ["vals", "expected"],
+    [
+        (["1", "2"], array("q", [1, 2])),
+        (["1", "2.5", 3], array("d", [1.0, 2.5, 3.0])),
+        ([str(2**70), "1"], array("d", [2.0**70, 1.0])),
+        (["1", "x"], [1, "x"]),
+        (["True", "1"], [True, 1]),
+        ([], []),
+    ],
+)
+def test_convert_values_as_array(vals, expected):
+    assert convert_values(vals, as_array=True) == expected
+
+
+class TestIntrospectionCache:
+    def test_results_are_copies(self):
+        parser, _ = build_parser()
+        parser.arg_defaults(unique=True)["new"] = 1
+        parser.dests_by_subparser()["run"].append("new")
+        parser.arg_defaults()["run"]["new"] = 1
+        assert "new" not in parser.arg_defaults(unique=True)
+        assert "new" not in parser.dests_by_subparser()["run"]
+        assert "new" not in parser.arg_defaults("run")["run"]
+
+    def test_sees_new_arguments_and_subcommands(self):
+        parser, _ = build_parser()
+        before = parser.arg_defaults(unique=True)
+        parser.subparsers().choices["run"].add_argument("--fresh", default=3)
+        assert parser.arg_defaults(unique=True) == dict(before, fresh=3)
+        group = parser.subparsers().choices["run"].add_argument_group("extra")
+        group.add_argument("--grouped", default=4)
+        assert parser.dests_by_subparser("run")["run"][-2:] == ["fresh", "grouped"]
+        parser.subparsers().add_parser("brand-new")
+        assert "brand-new" in parser.subcommands()
+        parser.add_argument("--top", default=5)
+        assert parser.arg_defaults(top_level=True)["top"] == 5
+
+    def test_sees_set_defaults(self):
+        parser, _ = build_parser()
+        parser.arg_defaults(unique=True)
+        parser.subparsers().choices["run"].set_defaults(dry_run=True)
+        assert parser.arg_defaults("run")["run"]["dry_run"] is True
+        parser.suppress_defaults()
+        assert parser.arg_defaults("run")["run"]["dry_run"] == argparse.SUPPRESS
+
+    def test_requires_one_subparsers_action(self):
+        parser = VersionInHelpParser(prog="test")
+        with pytest.raises(ValueError):
+            parser.dests_by_subparser()
+        with pytest.raises(ValueError):
+            parser.arg_defaults(unique=True)
+
+
+class TestLazySubcommands:
+    @pytest.fixture
+    def built(self):
+        return []
+
+    @pytest.fixture
+    def parser(self, built):
+        def factory(name):
+            def add_arguments(sub):
+                built.append(name)
+                sub.add_argument("--{}-opt".format(name), default=name.upper())
+
+            return add_arguments
+
+        parser = VersionInHelpParser(prog="test", version="0.1")
+        subs = parser.add_subparsers(dest="command")
+        subs.add_parser("eager").add_argument("--eager-opt", default="EAGER")
+        subs.add_lazy_parser("first", factory("first"), help="First command", aliases=["1st"])
+        subs.add_lazy_parser("second", factory("second"), help="Second command")
+        return parser
+
+    def test_only_selected_parser_is_built(self, parser, built):
+        args = parser.parse_args(["second", "--second-opt", "x"])
+        assert args.command == "second" and args.second_opt == "x"
+        assert built == ["second"]
+
+    def test_alias_builds_parser(self, parser, built):
+        assert parser.parse_args(["1st"]).first_opt == "FIRST"
+        assert built == ["first"]
+        assert parser.subparsers().choices["1st"] is parser.subparsers().choices["first"]
+
+    def test_help_lists_unbuilt_subcommands(self, parser, built):
+        help_text = parser.format_help()
+        assert "First command" in help_text and "Second command" in help_text
+        assert built == []
+
+    def test_introspection_builds_on_demand(self, parser, built):
+        assert parser.subcommands() == ["eager", "first", "1st", "second"]
+        assert parser.dests_by_subparser("second") == {"second": ["second_opt"]}
+        assert built == ["second"]
+        assert parser.arg_defaults(unique=True) == {
+            "eager_opt": "EAGER",
+            "first_opt": "FIRST",
+            "second_opt": "SECOND",
+        }
+        assert list(parser.dests_by_subparser()) == ["eager", "first", "1st", "second"]
+        assert built == ["second", "first"]
+
+    def test_conflicting_name(self, parser):
+        with pytest.raises(argparse.ArgumentError):
+            parser.subparsers().add_lazy_parser("eager", lambda sub: None)
@@ -1,5 +1,6 @@
 """Tests for collection utilities"""
 
+import copy
 import itertools
 import random
 import string
@@ -246,3 +247,232 @@ def test_deep_update_replace_scalar_with_dict():
     new = {"a": {"nested": "dict"}, "b": {"also": "nested"}}
     deep_update(old, new)
     assert old == {"a": {"nested": "dict"}, "b": {"also": "nested"}}
+
+
+def _nested(depth, leaf):
+    """Build a dict nested `depth` levels deep under key 'k'."""
+    d = leaf
+    for _ in range(depth):
+        d = {"k": d}
+    return d
+
+
+def test_deep_update_merges_nested():
+    old = {"a": {"x": 1, "y": {"z": 2}}, "b": 1}
+    deep_update(old, {"a": {"y": {"w": 3}}, "c": 4})
+    assert old == {"a": {"x": 1, "y": {"z": 2, "w": 3}}, "b": 1, "c": 4}
+
+
+def test_deep_update_empty_mapping_replaces():
+    old = {"a": {"x": 1}}
+    deep_update(old, {"a": {}})
+    assert old == {"a": {}}
+
+
+def test_deep_update_max_depth():
+    old = {"a": {"x": 1, "y": {"z": 2}}}
+    deep_update(old, {"a": {"y": {"w": 3}}}, max_depth=2)
+    assert old == {"a": {"x": 1, "y": {"w": 3}}}
+
+
+def test_deep_update_beyond_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    old = _nested(depth, {"old": 1})
+    deep_update(old, _nested(depth, {"new": 2}))
+    for _ in range(depth):
+        old = old["k"]
+    assert old == {"old": 1, "new": 2}
+
+
+def test_deep_merge_leaves_inputs_unchanged():
+    old = {"a": {"x": 1, "y": {"z": 2}}, "b": {"c": 3}}
+    new = {"a": {"y": {"w": 3}}}
+    merged = deep_merge(old, new)
+    assert merged == {"a": {"x": 1, "y": {"z": 2, "w": 3}}, "b": {"c": 3}}
+    assert old == {"a": {"x": 1, "y": {"z": 2}}, "b": {"c": 3}}
+    assert new == {"a": {"y": {"w": 3}}}
+
+
+def test_deep_merge_shares_unchanged_branches():
+    old = {"a": {"x": 1}, "b": {"c": 3}}
+    new = {"a": {"y": 2}, "d": {"e": 4}}
+    merged = deep_merge(old, new)
+    assert merged["b"] is old["b"]
+    assert merged["d"] is new["d"]
+    assert merged["a"] is not old["a"]
+
+
+@pytest.mark.parametrize(
+    ["strategy", "expected"],
+    [("replace", [2, 3]), ("extend", [1, 2, 2, 3]), ("unique", [1, 2, 3])],
+)
+def test_deep_merge_list_strategies(strategy, expected):
+    old = {"a": {"l": [1, 2]}}
+    merged = deep_merge(old, {"a": {"l": [2, 3]}}, list_strategy=strategy)
+    assert merged["a"]["l"] == expected
+    assert old["a"]["l"] == [1, 2]
+
+
+def test_deep_merge_unknown_list_strategy():
+    with pytest.raises(ValueError):
+        deep_merge({}, {}, list_strategy="bogus")
+
+
+LAYERS = [
+    {"a": 1, "nested": {"x": 1, "y": {"z": 1}}, "scalar_then_dict": 1, "l": [1]},
+    {"nested": {"y": {"w": 2}}, "emptied": {"q": 1}},
+    {"a": 3, "scalar_then_dict": {"s": 3}, "emptied": {}, "l": [3]},
+]
+
+
+def test_merge_many_deep_matches_chained_deep_update():
+    expected = {}
+    for layer in LAYERS:
+        deep_update(expected, copy.deepcopy(layer))
+    assert merge_many(*LAYERS) == expected
+
+
+def test_merge_many_shallow_matches_chained_merge_dicts():
+    expected = {}
+    for layer in LAYERS:
+        expected = merge_dicts(expected, layer)
+    assert merge_many(*LAYERS, deep=False) == expected
+
+
+def test_merge_many_leaves_inputs_unchanged():
+    before = copy.deepcopy(LAYERS)
+    merge_many(*LAYERS)
+    assert LAYERS == before
+
+
+@pytest.mark.parametrize("deep", [True, False])
+def test_merge_many_lazy_view_matches_eager(deep):
+    view = merge_many(*LAYERS, deep=deep, lazy=True)
+    eager = merge_many(*LAYERS, deep=deep)
+    assert view == eager
+    assert list(view) == list(eager)
+    assert len(view) == len(eager)
+    assert "nested" in view and "missing" not in view
+    with pytest.raises(KeyError):
+        view["missing"]
+
+
+def test_merge_many_lazy_view_reflects_layer_changes():
+    layers = [{"a": {"x": 1}}, {"a": {"y": 2}}]
+    view = merge_many(*layers, lazy=True)
+    layers[1]["a"]["y"] = 5
+    assert view["a"]["y"] == 5
+
+
+def test_merge_many_no_mappings():
+    assert merge_many() == {}
+    assert dict(merge_many(lazy=True)) == {}
+
+
+POWERSET_SIZE_KWARGS = [
+    {},
+    {"nonempty": True},
+    {"include_full_pop": False},
+    {"min_items": 2},
+    {"max_items": 2},
+    {"min_items": 1, "max_items": 3, "include_full_pop": False},
+]
+
+
+@pytest.mark.parametrize("kwargs", POWERSET_SIZE_KWARGS)
+def test_ipowerset_matches_powerset(kwargs):
+    pool = list(range(6))
+    expected = powerset(pool, **kwargs)
+    assert list(ipowerset(iter(pool), **kwargs)) == expected
+    for k, subset in enumerate(expected):
+        assert nth_subset(pool, k, **kwargs) == subset
+
+
+@pytest.mark.parametrize("kwargs", POWERSET_SIZE_KWARGS)
+@pytest.mark.parametrize(["start", "stop"], [(0, 5), (3, 30), (17, None), (40, 100), (5, 5)])
+def test_ipowerset_slice(kwargs, start, stop):
+    pool = "abcdef"
+    observed = list(ipowerset(pool, start=start, stop=stop, **kwargs))
+    assert observed == powerset(pool, **kwargs)[start:stop]
+
+
+@pytest.mark.parametrize(["start", "stop"], [(-1, None), (-3, 2), (5, 4)])
+def test_ipowerset_invalid_slice(start, stop):
+    with pytest.raises(ValueError):
+        ipowerset("abcd", start=start, stop=stop)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100])
+def test_powerset_chunks_cover_powerset(chunk_size):
+    pool = "abcdef"
+    chunks = list(powerset_chunks(pool, chunk_size, nonempty=True))
+    assert all(b - a <= chunk_size for a, b in chunks)
+    combined = [s for a, b in chunks for s in ipowerset(pool, nonempty=True, start=a, stop=b)]
+    assert combined == powerset(pool, nonempty=True)
+
+
+def test_nth_subset_out_of_range():
+    with pytest.raises(IndexError):
+        nth_subset("abc", 8)
+    with pytest.raises(IndexError):
+        nth_subset("abc", -1)
+
+
+def test_ipowerset_validates_eagerly():
+    with pytest.raises(ValueError):
+        ipowerset("abc", min_items=0, nonempty=True)
+    with pytest.raises(TypeError):
+        ipowerset("abc", max_items=1.5)
+
+
+@pytest.mark.parametrize("kwargs", POWERSET_SIZE_KWARGS)
+def test_powerset_masks_decode_to_powerset(kwargs):
+    pool = "abcdef"
+    masks = powerset_masks(pool, **kwargs)
+    assert masks.typecode == "Q"
+    assert [decode_mask(pool, m) for m in masks] == powerset(pool, **kwargs)
+    assert list(ipowerset(pool, start=3, stop=20, as_masks=True, **kwargs)) == list(masks[3:20])
+
+
+@pytest.mark.parametrize("start", [0, 1, 99, 1000, 5000, 16383])
+def test_ipowerset_masks_match_subsets(start):
+    pool = tuple(range(14))
+    masks = ipowerset(pool, start=start, as_masks=True)
+    subsets = ipowerset(pool, start=start)
+    assert [decode_mask(pool, m) for m in masks] == list(subsets)
+
+
+def test_powerset_masks_limits():
+    with pytest.raises(ValueError):
+        powerset_masks(range(65), max_items=1)
+    assert powerset_masks(range(64), min_items=64)[0] == 2**64 - 1
+    with pytest.raises(ValueError):
+        decode_mask("abc", 0b1000)
+    with pytest.raises(ValueError):
+        decode_mask("abc", -1)
+    assert decode_mask("abc", 0) == ()
+
+
+def test_iuniqify_is_lazy_and_ordered():
+    stream = iuniqify(iter([3, 1, 3, 2, 1]))
+    assert next(stream) == 3
+    assert list(stream) == [1, 2]
+
+
+def test_uniqify_unhashable_items():
+    rows = [{"a": [1, 2]}, {"a": [1, 2]}, {"a": [2, 1]}, [1, 2], (1, 2), [1, 2], {1, 2}, {2, 1}]
+    expected = [{"a": [1, 2]}, {"a": [2, 1]}, [1, 2], (1, 2), {1, 2}]
+    assert list(iuniqify(rows)) == expected
+    assert uniqify(rows) == expected
+
+
+def test_iuniqify_key():
+    rows = [{"name": "a", "n": 1}, {"name": "b", "n": 2}, {"name": "a", "n": 3}]
+    assert [r["n"] for r in iuniqify(rows, key=lambda r: r["name"])] == [1, 2]
+
+
+def test_iuniqify_max_seen():
+    assert list(iuniqify([1, 2, 1, 3, 1, 2], max_seen=2)) == [1, 2, 3, 2]
+    assert list(iuniqify([[1], [1], [2]], max_seen=1)) == [[1], [2]]
+    with pytest.raises(ValueError):
+        iuniqify([], max_seen=0)
@@ -1,10 +1,15 @@
 """Tests for environment-related functionality"""
 
+import contextvars
 import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
-from ubiquerg import TmpEnv
+from ubiquerg import ScopedEnv, TmpEnv, scoped_environ, scoped_getenv
 
 
 @pytest.mark.parametrize(
@@ -67,6 +72,76 @@ def test_overwrite_restores_original_value():
         os.environ.pop("UBIQUERG_TEST_RESTORE", None)
 
 
+class TestScopedEnv:
+    def test_leaves_os_environ_alone(self):
+        check_unset(["UBIQUERG_SCOPED"])
+        with ScopedEnv(UBIQUERG_SCOPED="inner"):
+            assert scoped_getenv("UBIQUERG_SCOPED") == "inner"
+            assert scoped_environ()["UBIQUERG_SCOPED"] == "inner"
+            check_unset(["UBIQUERG_SCOPED"])
+        assert scoped_getenv("UBIQUERG_SCOPED", "default") == "default"
+
+    def test_nesting_and_unsetting(self, monkeypatch):
+        monkeypatch.setenv("UBIQUERG_SCOPED", "outer")
+        with ScopedEnv(overwrite=True, UBIQUERG_SCOPED="middle") as scope:
+            with ScopedEnv(overwrite=True, UBIQUERG_SCOPED=None):
+                assert scoped_getenv("UBIQUERG_SCOPED") is None
+                assert "UBIQUERG_SCOPED" not in scoped_environ()
+            assert scoped_getenv("UBIQUERG_SCOPED") == "middle"
+            with scope:
+                assert scoped_getenv("UBIQUERG_SCOPED") == "middle"
+        assert scoped_getenv("UBIQUERG_SCOPED") == "outer"
+
+    def test_overwrite_prohibited(self, monkeypatch):
+        monkeypatch.setenv("UBIQUERG_SCOPED", "outer")
+        with pytest.raises(ValueError):
+            ScopedEnv(UBIQUERG_SCOPED="other")
+        with pytest.raises(ValueError):
+            ScopedEnv(UBIQUERG_SCOPED=None)
+        with ScopedEnv(UBIQUERG_SCOPED="outer"):
+            pass
+
+    def test_concurrent_scopes_are_isolated(self):
+        barrier = threading.Barrier(8)
+
+        def task(i):
+            with ScopedEnv(UBIQUERG_SCOPED=str(i)):
+                barrier.wait()
+                return scoped_getenv("UBIQUERG_SCOPED")
+
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(task, range(8))) == [str(i) for i in range(8)]
+
+    def test_shared_instance_across_threads(self):
+        scope = ScopedEnv(UBIQUERG_SCOPED="shared")
+        barrier = threading.Barrier(8)
+
+        def task(i):
+            with ScopedEnv(UBIQUERG_SCOPED=str(i)):
+                with scope:
+                    barrier.wait()
+                    inner = scoped_getenv("UBIQUERG_SCOPED")
+                return inner, scoped_getenv("UBIQUERG_SCOPED")
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(task, range(8)))
+        assert results == [("shared", str(i)) for i in range(8)]
+
+    def test_copied_context_carries_scope(self):
+        with ScopedEnv(UBIQUERG_SCOPED="carried"):
+            ctx = contextvars.copy_context()
+        assert ctx.run(scoped_getenv, "UBIQUERG_SCOPED") == "carried"
+        assert scoped_getenv("UBIQUERG_SCOPED") is None
+
+    def test_subprocess_env(self):
+        code = "import os; print(os.environ['UBIQUERG_SCOPED'])"
+        with ScopedEnv(UBIQUERG_SCOPED="child"):
+            out = subprocess.run(
+                [sys.executable, "-c", code], env=scoped_environ(), capture_output=True, text=True
+            )
+        assert out.stdout.strip() == "child"
+
+
 def check_unset(envvars):
     """Verify that each environment variable is not set."""
     fails = [v for v in envvars if os.getenv(v) or v in os.environ]
@@ -3,6 +3,8 @@
 import hashlib
 import itertools
 import os
+import threading
+import time
 from tempfile import mkdtemp
 
 import pytest
@@ -10,17 +12,28 @@ import pytest
 from ubiquerg import (
     READ,
     WRITE,
+    FlockLocker,
+    NoopLocker,
     OneLocker,
     ThreeLocker,
     checksum,
     create_file_racefree,
     create_lock,
     filesize_to_str,
+    get_lock_backend,
+    iter_locked,
     make_lock_path,
+    make_locker,
+    read_lock,
+    register_lock_backend,
     remove_lock,
+    set_lock_backend,
     size,
     wait_for_lock,
+    wait_for_locks,
+    write_lock,
 )
+from ubiquerg.file_locking import _LOCK_BACKENDS, _LOCK_POLICY, LOCK_BACKENDS_ENV_VAR
 
 
 def pytest_generate_tests(metafunc):
@@ -303,3 +316,321 @@ class TestEnsureWriteAccess:
         fake_lock_path = "/nonexistent_dir_xyz/lock-write-test.yaml"
         result = ensure_write_access(fake_lock_path, strict_ro_locks=False)
         assert result is False
+
+
+class TestFlockLocker:
+    def test_write_lock_creates_flock_file(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "test.yaml")
+        locker = FlockLocker(fp)
+        assert locker.write_lock() is True
+        assert locker.locked[READ] is True
+        assert locker.locked[WRITE] is True
+        assert os.listdir(tmpdir.strpath) == ["lock-flock-test.yaml"]
+        locker.write_unlock()
+        assert locker.locked[WRITE] is False
+
+    def test_shared_read_locks(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "test.yaml")
+        one, two = FlockLocker(fp), FlockLocker(fp)
+        assert one.read_lock() is True
+        assert two.read_lock() is True
+        one.read_unlock()
+        two.read_unlock()
+
+    def test_write_lock_excludes_readers(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "test.yaml")
+        writer, reader = FlockLocker(fp), FlockLocker(fp, wait_max=0.05)
+        writer.write_lock()
+        with pytest.raises(RuntimeError):
+            reader.read_lock()
+        writer.write_unlock()
+        assert reader.read_lock() is True
+        reader.read_unlock()
+
+    def test_read_lock_upgrades_to_write_lock(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "test.yaml")
+        locker, other = FlockLocker(fp, wait_max=1), FlockLocker(fp)
+        locker.read_lock()
+        fd = locker._fd
+        assert locker.write_lock() is True
+        assert locker._fd == fd
+        assert locker.locked == {READ: True, WRITE: True}
+        assert other.try_read_lock() is False
+        locker.write_unlock()
+        assert other.try_write_lock() is True
+        other.write_unlock()
+
+    def test_failed_upgrade_keeps_read_lock(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "test.yaml")
+        locker, reader = FlockLocker(fp), FlockLocker(fp)
+        locker.read_lock()
+        reader.read_lock()
+        assert locker.try_write_lock() is False
+        assert locker.locked == {READ: True, WRITE: False}
+        assert locker._fd is not None
+        reader.read_unlock()
+        locker.read_unlock()
+
+    def test_relocking_raises(self, tmpdir):
+        locker = FlockLocker(os.path.join(tmpdir.strpath, "test.yaml"))
+        locker.read_lock()
+        with pytest.raises(RuntimeError):
+            locker.read_lock()
+        locker.write_lock()
+        with pytest.raises(RuntimeError):
+            locker.write_lock()
+        with pytest.raises(RuntimeError):
+            locker.read_lock()
+        locker.write_unlock()
+        assert locker._fd is None
+
+
+class TestLockBackends:
+    @pytest.fixture(autouse=True)
+    def clean_policy(self, monkeypatch):
+        monkeypatch.delenv(LOCK_BACKENDS_ENV_VAR, raising=False)
+        yield
+        _LOCK_POLICY.clear()
+
+    def test_default_backend(self, tmpdir):
+        assert get_lock_backend(os.path.join(tmpdir.strpath, "a.yaml")) == "three"
+        assert isinstance(make_locker(os.path.join(tmpdir.strpath, "a.yaml")), ThreeLocker)
+
+    def test_longest_prefix_wins(self, tmpdir):
+        set_lock_backend(tmpdir.strpath, "flock")
+        set_lock_backend(os.path.join(tmpdir.strpath, "ro"), "noop")
+        assert get_lock_backend(os.path.join(tmpdir.strpath, "a.yaml")) == "flock"
+        assert get_lock_backend(os.path.join(tmpdir.strpath, "ro", "a.yaml")) == "noop"
+        assert get_lock_backend(os.path.join(tmpdir.strpath + "2", "a.yaml")) == "three"
+
+    def test_env_var_policy(self, tmpdir, monkeypatch):
+        value = os.pathsep.join(["one", tmpdir.strpath + "=noop"])
+        monkeypatch.setenv(LOCK_BACKENDS_ENV_VAR, value)
+        assert get_lock_backend(os.path.join(tmpdir.strpath, "a.yaml")) == "noop"
+        assert get_lock_backend("/elsewhere/a.yaml") == "one"
+
+    def test_explicit_policy_overrides_env(self, tmpdir, monkeypatch):
+        monkeypatch.setenv(LOCK_BACKENDS_ENV_VAR, tmpdir.strpath + "=noop")
+        set_lock_backend(tmpdir.strpath, "flock")
+        assert get_lock_backend(os.path.join(tmpdir.strpath, "a.yaml")) == "flock"
+
+    def test_unknown_backend_raises(self, tmpdir):
+        with pytest.raises(ValueError):
+            set_lock_backend(tmpdir.strpath, "nonexistent")
+        with pytest.raises(ValueError):
+            make_locker(os.path.join(tmpdir.strpath, "a.yaml"), backend="nonexistent")
+
+    def test_registered_backend_used_by_read_lock(self, tmpdir):
+        class RecordingLocker(NoopLocker):
+            instances = []
+
+            def __init__(self, filepath, **kwargs):
+                super().__init__(filepath, **kwargs)
+                self.instances.append(self)
+
+        register_lock_backend("recording", RecordingLocker)
+        set_lock_backend(tmpdir.strpath, "recording")
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        with write_lock(fp):
+            assert RecordingLocker.instances[-1].locked[WRITE] is True
+        assert RecordingLocker.instances[-1].locked[WRITE] is False
+        assert os.listdir(tmpdir.strpath) == []
+        _LOCK_BACKENDS.pop("recording")
+
+
+class TestLockerCache:
+    def test_unlocked_locker_is_reused(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        assert make_locker(fp) is make_locker(fp)
+
+    def test_relative_and_absolute_paths_share_locker(self, tmpdir):
+        with tmpdir.as_cwd():
+            assert make_locker("a.yaml") is make_locker(os.path.join(tmpdir.strpath, "a.yaml"))
+
+    def test_locked_locker_is_not_handed_out(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        locker = make_locker(fp)
+        locker.write_lock()
+        other = make_locker(fp)
+        assert other is not locker
+        locker.write_unlock()
+
+    def test_threads_get_their_own_lockers(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        lockers = []
+        thread = threading.Thread(target=lambda: lockers.append(make_locker(fp)))
+        thread.start()
+        thread.join()
+        assert lockers[0] is not make_locker(fp)
+
+    @pytest.mark.parametrize("backend", ["three", "one", "flock"])
+    def test_concurrent_read_locks_on_one_path(self, backend, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        set_lock_backend(tmpdir.strpath, backend)
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def reader():
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    with read_lock(fp):
+                        pass
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert errors == []
+            locker = make_locker(fp, wait_max=1)
+            assert locker.try_write_lock()
+            locker.write_unlock()
+        finally:
+            set_lock_backend(tmpdir.strpath, None)
+
+    def test_settings_are_part_of_cache_key(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        assert make_locker(fp, wait_max=1) is not make_locker(fp, wait_max=2)
+        assert make_locker(fp, backend="one") is not make_locker(fp)
+
+    @pytest.mark.parametrize("cls", [ThreeLocker, OneLocker, FlockLocker, NoopLocker])
+    def test_lockers_use_slots(self, cls, tmpdir):
+        locker = cls(os.path.join(tmpdir.strpath, "a.yaml"))
+        assert not hasattr(locker, "__dict__")
+
+
+class TestLockDeadlines:
+    @pytest.mark.parametrize("cls", [ThreeLocker, OneLocker, FlockLocker])
+    def test_try_write_lock_fails_fast_when_held(self, cls, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        holder, other = cls(fp), cls(fp, wait_max=60)
+        holder.write_lock()
+        start = time.monotonic()
+        assert other.try_write_lock() is False
+        assert other.try_read_lock() is False
+        assert time.monotonic() - start < 1
+        holder.write_unlock()
+        assert other.try_write_lock() is True
+        other.write_unlock()
+
+    def test_failed_try_lock_leaves_no_universal_lock(self, tmpdir):
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        holder, other = ThreeLocker(fp), ThreeLocker(fp)
+        holder.write_lock()
+        assert other.try_write_lock() is False
+        holder.write_unlock()
+        assert os.listdir(tmpdir.strpath) == []
+
+    def test_deadline_overrides_wait_max(self, tmpdir):
+        lock = os.path.join(tmpdir.strpath, "lock.a.yaml")
+        create_file_racefree(lock)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError):
+            wait_for_lock(lock, wait_max=60, deadline=start + 0.05)
+        assert time.monotonic() - start < 1
+
+    def test_cancel_from_another_thread(self, tmpdir):
+        lock = os.path.join(tmpdir.strpath, "lock.a.yaml")
+        create_file_racefree(lock)
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="cancelled"):
+            wait_for_locks([lock], wait_max=60, cancel=cancel)
+        assert time.monotonic() - start < 5
+
+    def test_context_manager_deadline_restores_signal_handlers(self, tmpdir):
+        import signal
+
+        fp = os.path.join(tmpdir.strpath, "a.yaml")
+        holder = ThreeLocker(fp)
+        holder.write_lock()
+        before = signal.getsignal(signal.SIGINT)
+        with pytest.raises(RuntimeError):
+            with read_lock(fp, deadline=time.monotonic()):
+                pass
+        assert signal.getsignal(signal.SIGINT) is before
+        holder.write_unlock()
+
+
+class TestWaitForLocks:
+    def _make_locks(self, tmpdir, n):
+        locks = [os.path.join(tmpdir.strpath, f"lock.{i}.yaml") for i in range(n)]
+        for lock in locks:
+            create_file_racefree(lock)
+        return locks
+
+    def test_no_locks_returns_immediately(self, tmpdir):
+        assert wait_for_locks([os.path.join(tmpdir.strpath, "lock.a")]) == []
+
+    def test_single_overall_deadline(self, tmpdir):
+        locks = self._make_locks(tmpdir, 5)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError):
+            wait_for_locks(locks, wait_max=0.2)
+        assert time.monotonic() - start < 1
+
+    def test_reports_held_locks(self, tmpdir):
+        locks = self._make_locks(tmpdir, 3)
+        os.remove(locks[1])
+        held = wait_for_locks(locks, wait_max=0.05, raise_on_timeout=False)
+        assert held == [locks[0], locks[2]]
+
+    def test_returns_when_all_released(self, tmpdir):
+        locks = self._make_locks(tmpdir, 3)
+        timers = [
+            threading.Timer(0.05 * (i + 1), os.remove, [lock]) for i, lock in enumerate(locks)
+        ]
+        for timer in timers:
+            timer.start()
+        assert wait_for_locks(locks, wait_max=10) == []
+
+
+class TestIterLocked:
+    def _paths(self, tmpdir, n):
+        return [os.path.join(tmpdir.strpath, f"{i}.yaml") for i in range(n)]
+
+    def _write_locks(self, tmpdir):
+        return sorted(f for f in os.listdir(tmpdir.strpath) if f.startswith("lock-write-"))
+
+    def test_each_file_locked_while_current(self, tmpdir):
+        paths = self._paths(tmpdir, 4)
+        seen = []
+        for path in iter_locked(paths, WRITE, prefetch=1):
+            assert f"lock-write-{os.path.basename(path)}" in self._write_locks(tmpdir)
+            seen.append(path)
+        assert seen == paths
+        assert os.listdir(tmpdir.strpath) == []
+
+    def test_prefetch_bounds_locks_held(self, tmpdir):
+        paths = self._paths(tmpdir, 6)
+        for _ in iter_locked(paths, WRITE, prefetch=2):
+            time.sleep(0.05)
+            assert len(self._write_locks(tmpdir)) <= 3
+
+    def test_early_exit_releases_prefetched_locks(self, tmpdir):
+        paths = self._paths(tmpdir, 5)
+        for path in iter_locked(paths, READ, prefetch=3):
+            time.sleep(0.05)
+            break
+        assert os.listdir(tmpdir.strpath) == []
+
+    def test_lock_errors_propagate(self, tmpdir):
+        paths = self._paths(tmpdir, 2)
+        holder = ThreeLocker(paths[1])
+        holder.write_lock()
+        it = iter_locked(paths, WRITE, wait_max=0.05)
+        assert next(it) == paths[0]
+        with pytest.raises(RuntimeError):
+            next(it)
+        holder.write_unlock()
+        assert os.listdir(tmpdir.strpath) == []
+
+    @pytest.mark.parametrize(["mode", "prefetch"], [("bogus", 1), (WRITE, 0)])
+    def test_invalid_arguments(self, mode, prefetch, tmpdir):
+        with pytest.raises(ValueError):
+            iter_locked(self._paths(tmpdir, 1), mode, prefetch)
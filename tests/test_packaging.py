@@ -1,5 +1,7 @@
 """Validate what's available directly on the top-level import."""
 
+import subprocess
+import sys
 from inspect import isclass, isfunction
 
 import pytest
@@ -12,23 +14,42 @@ import ubiquerg
     [
         # cli_tools
         ("convert_value", isfunction),
+        ("convert_values", isfunction),
         ("query_yes_no", isfunction),
         ("VersionInHelpParser", isclass),
         # collection
+        ("decode_mask", isfunction),
+        ("deep_merge", isfunction),
         ("deep_update", isfunction),
+        ("ipowerset", isfunction),
         ("is_collection_like", isfunction),
+        ("iuniqify", isfunction),
         ("merge_dicts", isfunction),
+        ("merge_many", isfunction),
+        ("nth_subset", isfunction),
         ("powerset", isfunction),
+        ("powerset_chunks", isfunction),
+        ("powerset_masks", isfunction),
         ("uniqify", isfunction),
         # environment
+        ("ScopedEnv", isclass),
+        ("scoped_environ", isfunction),
+        ("scoped_getenv", isfunction),
         ("TmpEnv", isclass),
         # file_locking
         ("ensure_locked", isfunction),
         ("ensure_write_access", isfunction),
+        ("FlockLocker", isclass),
+        ("get_lock_backend", isfunction),
+        ("iter_locked", isfunction),
         ("locked_read_file", isfunction),
         ("make_all_lock_paths", isfunction),
+        ("make_locker", isfunction),
+        ("NoopLocker", isclass),
         ("OneLocker", isclass),
         ("read_lock", isfunction),
+        ("register_lock_backend", isfunction),
+        ("set_lock_backend", isfunction),
         ("ThreeLocker", isclass),
         ("wait_for_locks", isfunction),
         ("write_lock", isfunction),
@@ -45,13 +66,26 @@ import ubiquerg
         # paths
         ("expandpath", isfunction),
         ("mkabs", isfunction),
+        ("mkabs_many", isfunction),
         ("parse_registry_path", isfunction),
+        ("parse_registry_path_columns", isfunction),
         ("parse_registry_path_strict", isfunction),
+        ("RegistryIndex", isclass),
+        ("parse_registry_paths", isfunction),
         # system
+        ("check_writable_many", isfunction),
         ("is_command_callable", isfunction),
         ("is_writable", isfunction),
+        ("which_many", isfunction),
+        # time
+        ("parse_timedelta", isfunction),
+        ("parse_timedeltas", isfunction),
         # web
+        ("classify_paths", isfunction),
+        ("has_scheme", isfunction),
+        ("get_scheme_handler", isfunction),
         ("is_url", isfunction),
+        ("register_scheme_handler", isfunction),
     ],
 )
 def test_top_level_exports(obj_name, typecheck):
@@ -83,3 +117,34 @@ def test_all_matches_exports():
     extra = declared - actual
     assert not missing, f"In dir() but not __all__: {missing}"
     assert not extra, f"In __all__ but not importable: {extra}"
+
+
+def test_lazy_exports_cover_all():
+    """Every name in __all__ must be mapped to the submodule that defines it."""
+    assert set(ubiquerg._EXPORT_MODULES) == set(ubiquerg.__all__)
+
+
+def test_submodules_reachable_after_bare_import():
+    """Submodules must be attributes of the package, as when it imported them eagerly."""
+    code = (
+        "import types, ubiquerg; "
+        "print(all(isinstance(getattr(ubiquerg, m), types.ModuleType) for m in ubiquerg._EXPORTS)); "
+        "print(ubiquerg.paths.mkabs('/a') == '/a')"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["True", "True"]
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        ubiquerg.not_an_export
+
+
+def test_import_is_lazy():
+    """Importing the package alone must not import the submodules or their dependencies."""
+    code = (
+        "import sys, ubiquerg; "
+        "print(sorted(m for m in ('argparse', 'tarfile', 'ubiquerg.web') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -4,7 +4,16 @@ import os
 
 import pytest
 
-from ubiquerg import expandpath, mkabs, parse_registry_path
+from ubiquerg import (
+    RegistryIndex,
+    expandpath,
+    mkabs,
+    mkabs_many,
+    parse_registry_path,
+    parse_registry_path_columns,
+    parse_registry_path_strict,
+    parse_registry_paths,
+)
 
 __author__ = "Vince Reuter"
 __email__ = "vreuter@virginia.edu"
@@ -108,6 +117,75 @@ def test_registry_path(registry_path, output):
     assert pvars == output
 
 
+def test_registry_path_custom_defaults():
+    defaults = [("p", "default"), ("n", None), ("i", None), ("s", None), ("t", "latest")]
+    assert parse_registry_path("hg38/fasta", defaults) == {
+        "p": "default",
+        "n": "hg38",
+        "i": "fasta",
+        "s": None,
+        "t": "latest",
+    }
+
+
+def test_registry_path_result_is_not_shared():
+    parse_registry_path("hg38/fasta")["item"] = "changed"
+    assert parse_registry_path("hg38/fasta")["item"] == "fasta"
+
+
+def test_parse_registry_paths_bulk():
+    rpstrings = ["hg38/fasta:default", "not a path", "proto::ns/item.sub:tag", "item"]
+    assert parse_registry_paths(rpstrings) == [
+        (None, "hg38", "fasta", None, "default"),
+        None,
+        ("proto", "ns", "item", "sub", "tag"),
+        (None, None, "item", None, None),
+    ]
+    for rp, parsed in zip(rpstrings, parse_registry_paths(iter(rpstrings))):
+        expected = parse_registry_path(rp)
+        assert (parsed is None) == (expected is None)
+        if parsed is not None:
+            assert parsed == tuple(expected.values())
+
+
+def test_parse_registry_path_columns():
+    columns = parse_registry_path_columns(["hg38/fasta:default", "bad path", None, "fasta"])
+    assert columns["namespace"] == ["hg38", None, None, None]
+    assert columns["item"] == ["fasta", None, None, "fasta"]
+    assert columns["tag"] == ["default", None, None, None]
+    assert columns["valid"] == [True, False, False, True]
+
+
+def test_parse_registry_path_columns_keeps_components_of_unmet_requirements():
+    columns = parse_registry_path_columns(["fasta", "bad path"], require_namespace=True)
+    assert columns["item"] == ["fasta", None]
+    assert columns["valid"] == [False, False]
+
+
+def test_parse_registry_path_columns_empty():
+    columns = parse_registry_path_columns([])
+    assert all(v == [] for v in columns.values())
+    assert "valid" in columns
+
+
+@pytest.mark.parametrize(
+    "flags",
+    [
+        {},
+        {"require_namespace": True},
+        {"require_tag": True, "require_protocol": True},
+        {"require_subitem": True},
+        {"require_item": False},
+    ],
+)
+def test_parse_registry_path_columns_matches_strict(flags):
+    rpstrings = ["hg38/fasta:default", "p::ns/i.s:t", "item", "ns/item.sub", "x y"]
+    columns = parse_registry_path_columns(rpstrings, **flags)
+    assert columns["valid"] == [
+        parse_registry_path_strict(rp, **flags) is not None for rp in rpstrings
+    ]
+
+
 def test_mkabs():
     relpath = "abc.txt"
     abspath = mkabs(relpath)
@@ -115,3 +193,106 @@ def test_mkabs():
     assert abspath == os.path.join(os.getcwd(), relpath)
     url = "http://example.com"
     assert mkabs(url) == url
+
+
+def test_parse_registry_path_columns_numpy():
+    np = pytest.importorskip("numpy")
+    columns = parse_registry_path_columns(np.array(["hg38/fasta", "bad path"]))
+    assert columns["namespace"] == ["hg38", None]
+    assert columns["valid"] == [True, False]
+
+
+class TestRegistryIndex:
+    CATALOG = [
+        "hg38/fasta:default",
+        "hg38/fasta:v2",
+        "hg38/bowtie2_index:default",
+        "mm10/bowtie2_index:default",
+        "refgenie::hg19/fasta.fai:default",
+        "bowtie2_index",
+    ]
+
+    @pytest.fixture
+    def index(self):
+        return RegistryIndex(self.CATALOG)
+
+    def brute_force(self, query):
+        """Reference matcher: scan every entry."""
+        import fnmatch
+
+        q = parse_registry_path(query.replace("*", "STAR").replace("?", "QMARK"))
+        hits = []
+        for rp in self.CATALOG:
+            entry = parse_registry_path(rp)
+            if all(
+                pattern is None
+                or fnmatch.fnmatchcase(
+                    entry[k] or "", pattern.replace("STAR", "*").replace("QMARK", "?")
+                )
+                for k, pattern in q.items()
+            ):
+                hits.append(rp)
+        return sorted(hits)
+
+    @pytest.mark.parametrize(
+        "query",
+        ["hg38/*:default", "*/bowtie2_index", "hg*/fasta", "hg?8/*", "*", "bowtie2_index"],
+    )
+    def test_find_matches_linear_scan(self, index, query):
+        assert index.find(query) == self.brute_force(query)
+
+    def test_exact_lookup(self, index):
+        assert index.find("hg38/fasta:v2") == ["hg38/fasta:v2"]
+        assert "hg38/fasta:v2" in index
+        assert index.find("hg38/nonexistent") == []
+
+    def test_incremental_add_and_remove(self, index):
+        index.add("hg38/bwa_index:default")
+        assert index.find("hg38/b*") == ["hg38/bowtie2_index:default", "hg38/bwa_index:default"]
+        index.remove("hg38/bowtie2_index:default")
+        assert index.find("hg38/b*") == ["hg38/bwa_index:default"]
+        assert index.find("*/bowtie2_index") == ["bowtie2_index", "mm10/bowtie2_index:default"]
+        assert len(index) == len(self.CATALOG)
+
+    def test_remove_missing_raises(self, index):
+        with pytest.raises(KeyError):
+            index.remove("hg38/nonexistent")
+
+    @pytest.mark.parametrize("bad", ["not a path", "a/b/c"])
+    def test_invalid_input_raises(self, index, bad):
+        with pytest.raises(ValueError):
+            index.add(bad)
+        with pytest.raises(ValueError):
+            index.find(bad)
+
+
+class TestMkabsMany:
+    PATHS = [
+        "abc.txt",
+        "sub/../abc.txt",
+        "/already/abs.txt",
+        "~/in_home.txt",
+        "$UBIQUERG_TEST_DIR/x.txt",
+        "${UBIQUERG_TEST_DIR}/y.txt",
+        "http://example.com/z.txt",
+        None,
+    ]
+
+    @pytest.mark.parametrize("reldir", [None, "", "tests", "tests/test_paths.py", "/tmp"])
+    def test_matches_mkabs(self, reldir, monkeypatch):
+        monkeypatch.setenv("UBIQUERG_TEST_DIR", "/data")
+        assert mkabs_many(self.PATHS, reldir) == [mkabs(p, reldir) for p in self.PATHS]
+
+    def test_env_change_invalidates(self, monkeypatch):
+        monkeypatch.setenv("UBIQUERG_TEST_DIR", "/first")
+        assert mkabs_many(["$UBIQUERG_TEST_DIR/x.txt"]) == ["/first/x.txt"]
+        monkeypatch.setenv("UBIQUERG_TEST_DIR", "/second")
+        assert mkabs_many(["$UBIQUERG_TEST_DIR/x.txt"]) == ["/second/x.txt"]
+        monkeypatch.setenv("HOME", "/home/someone")
+        assert mkabs_many(["~/x.txt"]) == ["/home/someone/x.txt"]
+
+    def test_cwd_change_invalidates(self, tmpdir):
+        before = mkabs_many(["x.txt"])
+        with tmpdir.as_cwd():
+            assert mkabs_many(["x.txt"]) == [os.path.join(tmpdir.strpath, "x.txt")]
+        assert mkabs_many(["x.txt"]) == before
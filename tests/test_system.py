@@ -1,11 +1,13 @@
 """Tests for system tools"""
 
 import os
+import shutil
 import subprocess
 
 import pytest
 
-from ubiquerg import is_command_callable
+from ubiquerg import check_writable_many, is_command_callable, is_writable, which_many
+from ubiquerg.system import _WRITABLE_PROBES, _path_listings
 
 __author__ = "Vince Reuter"
 __email__ = "vreuter@virginia.edu"
@@ -98,3 +100,99 @@ def test_extant_file_requires_exec_for_callability(tmpdir, filepath, setup, exp_
     setup(f)
     assert os.access(f, os.X_OK) is exp_exe
     assert is_command_callable(f) is exp_exe
+
+
+@pytest.mark.skipif(os.name == "nt", reason="PATH scanning is POSIX-only")
+class TestWhichMany:
+    @pytest.fixture
+    def path_dirs(self, tmpdir, monkeypatch):
+        first, second = tmpdir.mkdir("first").strpath, tmpdir.mkdir("second").strpath
+        for d, name, mode in [
+            (first, "tool", 0o644),
+            (second, "tool", 0o755),
+            (second, "other", 0o755),
+        ]:
+            os.chmod(_mkfile(os.path.join(d, name)), mode)
+        os.mkdir(os.path.join(first, "adir"))
+        monkeypatch.setenv("PATH", os.pathsep.join([first, second, first, "/does/not/exist"]))
+        which_many([], refresh=True)
+        return first, second
+
+    def test_matches_shutil_which(self, path_dirs):
+        cmds = ["tool", "other", "adir", "missing", os.path.join(path_dirs[1], "other")]
+        assert which_many(cmds) == {cmd: shutil.which(cmd) for cmd in cmds}
+        assert which_many(["tool"])["tool"] == os.path.join(path_dirs[1], "tool")
+
+    def test_cached_until_refresh(self, path_dirs):
+        assert which_many(["new"]) == {"new": None}
+        os.chmod(_mkfile(os.path.join(path_dirs[0], "new")), 0o755)
+        assert which_many(["new"]) == {"new": None}
+        assert is_command_callable("new")
+        assert which_many(["new"], refresh=True) == {"new": os.path.join(path_dirs[0], "new")}
+
+    def test_removed_command_isnt_callable(self, path_dirs):
+        assert is_command_callable("other")
+        os.remove(os.path.join(path_dirs[1], "other"))
+        assert not is_command_callable("other")
+
+    def test_rejects_non_string(self):
+        with pytest.raises(TypeError):
+            which_many(["ok", None])
+
+    def test_single_check_doesnt_list_path(self, path_dirs):
+        assert is_command_callable("other")
+        assert _path_listings.cache_info().currsize == 0
+
+
+class TestCheckWritableMany:
+    @pytest.fixture(autouse=True)
+    def clear_probes(self):
+        _WRITABLE_PROBES.clear()
+        yield
+        _WRITABLE_PROBES.clear()
+
+    def test_matches_is_writable(self, tmpdir):
+        base = tmpdir.strpath
+        folders = [
+            base,
+            os.path.join(base, "new", "deeper"),
+            "not_a_folder_here",
+            os.path.join("not_a_folder_here", "child"),
+            None,
+            "",
+        ]
+        assert check_writable_many(folders) == {f: is_writable(f) for f in folders}
+
+    def test_shared_parents_probed_once(self, tmpdir, monkeypatch):
+        probed = []
+        monkeypatch.setattr(os.path, "exists", lambda p: probed.append(p) or os.access(p, os.F_OK))
+        parent = os.path.join(tmpdir.strpath, "missing")
+        folders = [os.path.join(parent, "sample{}".format(i)) for i in range(50)]
+        assert all(check_writable_many(folders).values())
+        assert probed.count(parent) == 1 and probed.count(tmpdir.strpath) == 1
+        check_writable_many(folders)
+        assert len(probed) == 52
+
+    def test_ttl(self, tmpdir):
+        folder = os.path.join(tmpdir.strpath, "later")
+        check_writable_many([folder])
+        os.mkdir(folder)
+        assert _WRITABLE_PROBES[folder][1] is None
+        check_writable_many([folder], ttl=0)
+        assert _WRITABLE_PROBES[folder][1] is True
+
+    def test_create_and_check_exist(self, tmpdir):
+        folder = os.path.join(tmpdir.strpath, "a", "b")
+        with pytest.raises(OSError):
+            check_writable_many([folder], check_exist=True)
+        assert check_writable_many([folder], create=True) == {folder: True}
+        assert os.path.isdir(folder)
+        assert check_writable_many([folder], check_exist=True) == {folder: True}
+
+    def test_relative_folders_follow_working_directory(self, tmpdir, monkeypatch):
+        tmpdir.mkdir("with").mkdir("out")
+        tmpdir.mkdir("without")
+        monkeypatch.chdir(tmpdir.join("without").strpath)
+        assert check_writable_many(["out"]) == {"out": False}
+        monkeypatch.chdir(tmpdir.join("with").strpath)
+        assert check_writable_many(["out"]) == {"out": True}
@@ -1,10 +1,11 @@
 """Tests for ubiquerg.time module."""
 
 import datetime
+from array import array
 
 import pytest
 
-from ubiquerg import parse_timedelta
+from ubiquerg import parse_timedelta, parse_timedeltas
 
 
 class TestParseTimedelta:
@@ -41,3 +42,42 @@ class TestParseTimedelta:
     def test_missing_seconds_raises(self):
         with pytest.raises(ValueError):
             parse_timedelta("1:30")
+
+
+@pytest.mark.parametrize(
+    ["s", "expected"],
+    [
+        ("P1DT2H30M", datetime.timedelta(days=1, hours=2, minutes=30)),
+        ("PT45.5S", datetime.timedelta(seconds=45.5)),
+        ("PT1,5S", datetime.timedelta(seconds=1.5)),
+        ("P2W", datetime.timedelta(weeks=2)),
+        ("P1W2D", datetime.timedelta(days=9)),
+        ("-PT1M", -datetime.timedelta(minutes=1)),
+        ("1h30m", datetime.timedelta(hours=1, minutes=30)),
+        ("2d 3h", datetime.timedelta(days=2, hours=3)),
+        ("45s", datetime.timedelta(seconds=45)),
+        ("1.5H", datetime.timedelta(hours=1, minutes=30)),
+        ("1w1d1h1m1s", datetime.timedelta(days=8, hours=1, minutes=1, seconds=1)),
+        ("-1 day, 23:59:59", datetime.timedelta(seconds=-1)),
+        ("1:2:3", datetime.timedelta(hours=1, minutes=2, seconds=3)),
+    ],
+)
+def test_extended_formats(s, expected):
+    assert parse_timedelta(s) == expected
+
+
+@pytest.mark.parametrize(
+    "s", ["P", "PT", "P1DT", "PT1H2D", "P1Y", "P1M", "P1Y2M3D", "5", "", "1h30", "m", "1x"]
+)
+def test_extended_formats_invalid(s):
+    with pytest.raises(ValueError):
+        parse_timedelta(s)
+
+
+def test_parse_timedeltas():
+    values = ["0:01:30", "1 day, 0:00:00.5", "PT2H", "90m", "-45s"]
+    seconds = parse_timedeltas(values)
+    assert seconds == array("d", [90, 86400.5, 7200, 5400, -45])
+    assert list(seconds) == [parse_timedelta(v).total_seconds() for v in values]
+    with pytest.raises(ValueError):
+        parse_timedeltas(["0:00:01", "bad"])
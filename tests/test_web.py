@@ -1,8 +1,19 @@
 """Tests for web"""
 
+import hashlib
+
 import pytest
 
-from ubiquerg.web import is_url
+from ubiquerg import checksum, mkabs, mkabs_many, size
+from ubiquerg.web import (
+    _SCHEME_REGEX,
+    _URL_REGEX,
+    classify_paths,
+    get_scheme_handler,
+    has_scheme,
+    is_url,
+    register_scheme_handler,
+)
 
 
 @pytest.mark.parametrize("s", ["https://www.github.com", "https://www.youtube.com"])
@@ -13,3 +24,99 @@ def test_is_url_tests_positive(s):
 @pytest.mark.parametrize("s", ["www.github.com", "test: string spaces", "j%2vv@::https://test.com"])
 def test_is_url_tests_negative(s):
     assert not is_url(s)
+
+
+@pytest.mark.parametrize(
+    "s",
+    [
+        "http://localhost",
+        "HTTPS://Example.com/a?b=c",
+        "ftp://10.0.0.1:21/file",
+        "ftps://host.org",
+        "httpſ://example.com",
+        "s3://bucket/key",
+        "file:///tmp/x",
+        "gopher://example.com",
+        "http:/example.com",
+        "/local/path",
+        "relative/path.txt",
+        "",
+        "://",
+        "https://",
+        "https://not a url",
+    ],
+)
+def test_fast_checks_agree_with_regexes(s):
+    assert is_url(s) == (_URL_REGEX.match(s) is not None)
+    assert has_scheme(s) == (_SCHEME_REGEX.match(s) is not None)
+
+
+def test_classify_paths():
+    paths = ["/a/b.txt", "https://example.com/x", "s3://bucket/key", "file:///tmp/x", "a://"]
+    assert classify_paths(paths) == ["local", "url", "scheme", "scheme", "scheme"]
+
+
+class FakeObjectStore:
+    """In-memory object store handling s3:// paths."""
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def resolve(self, uri):
+        return uri.rstrip("/")
+
+    def size(self, uri):
+        return len(self.objects[uri])
+
+    def checksum(self, uri, blocksize):
+        return hashlib.md5(self.objects[uri]).hexdigest()
+
+
+class TestSchemeHandlers:
+    @pytest.fixture
+    def store(self):
+        store = FakeObjectStore({"s3://bucket/key": b"some data"})
+        register_scheme_handler("s3", store)
+        yield store
+        register_scheme_handler("s3", None)
+
+    def test_mkabs_leaves_unhandled_uris_alone(self):
+        assert mkabs("gs://bucket/key") == "gs://bucket/key"
+        assert mkabs("gs://bucket/key", "/some/dir") == "gs://bucket/key"
+
+    def test_mkabs_uses_handler(self, store, tmpdir):
+        assert get_scheme_handler("S3") is store
+        assert mkabs("s3://bucket/key/") == "s3://bucket/key"
+        assert mkabs_many(["s3://bucket/key/", "x"], tmpdir.strpath) == [
+            "s3://bucket/key",
+            tmpdir.join("x").strpath,
+        ]
+
+    def test_size_and_checksum_use_handler(self, store):
+        assert size("s3://bucket/key", size_str=False) == 9
+        assert checksum("s3://bucket/key") == hashlib.md5(b"some data").hexdigest()
+
+    def test_unhandled_scheme(self):
+        with pytest.warns(UserWarning):
+            assert size("gs://bucket/key") is None
+        with pytest.raises(ValueError):
+            checksum("gs://bucket/key")
+
+    def test_file_uris_are_local(self, tmpdir):
+        fp = tmpdir.join("a file.txt")
+        fp.write("data")
+        uri = "file://" + fp.strpath.replace(" ", "%20")
+        assert mkabs(uri) == fp.strpath
+        assert size(uri, size_str=False) == 4
+        assert checksum(uri) == checksum(fp.strpath)
+        assert mkabs("file://localhost/tmp/x") == "/tmp/x"
+        assert mkabs("file://LOCALHOST/tmp/x") == "/tmp/x"
+
+    @pytest.mark.parametrize("uri", ["file://otherhost/share/x", "file://otherhost"])
+    def test_remote_file_uris_raise(self, uri):
+        with pytest.raises(ValueError):
+            mkabs(uri)
+        with pytest.raises(ValueError):
+            size(uri)
+        with pytest.raises(ValueError):
+            checksum(uri)
@@ -3,73 +3,147 @@
 Version is defined in pyproject.toml. To get it at runtime:
     from importlib.metadata import version
     version("ubiquerg")
+
+Submodules are imported on first access to one of their exports (PEP 562),
+so e.g. using only mkabs doesn't pay for importing argparse or tarfile.
 """
 
-from .cli_tools import (
-    VersionInHelpParser,
-    convert_value,
-    query_yes_no,
-)
-from .collection import deep_update, is_collection_like, merge_dicts, powerset, uniqify
-from .environment import TmpEnv
-from .file_locking import (
-    READ,
-    WRITE,
-    OneLocker,
-    ThreeLocker,
-    ensure_locked,
-    ensure_write_access,
-    locked_read_file,
-    make_all_lock_paths,
-    read_lock,
-    wait_for_locks,
-    write_lock,
-)
-from .files import (
-    checksum,
-    create_file_racefree,
-    create_lock,
-    filesize_to_str,
-    make_lock_path,
-    remove_lock,
-    size,
-    untar,
-    wait_for_lock,
-)
-from .paths import expandpath, mkabs, parse_registry_path, parse_registry_path_strict
-from .system import is_command_callable, is_writable
-from .time import parse_timedelta
-from .web import has_scheme, is_url
+import importlib as _importlib
+
+# Same as typing.TYPE_CHECKING, without importing typing
+_TYPE_CHECKING = False
+
+if _TYPE_CHECKING:
+    from .cli_tools import (
+        VersionInHelpParser,
+        convert_value,
+        convert_values,
+        query_yes_no,
+    )
+    from .collection import (
+        decode_mask,
+        deep_merge,
+        deep_update,
+        ipowerset,
+        is_collection_like,
+        iuniqify,
+        merge_dicts,
+        merge_many,
+        nth_subset,
+        powerset,
+        powerset_chunks,
+        powerset_masks,
+        uniqify,
+    )
+    from .environment import ScopedEnv, TmpEnv, scoped_environ, scoped_getenv
+    from .file_locking import (
+        READ,
+        WRITE,
+        FlockLocker,
+        NoopLocker,
+        OneLocker,
+        ThreeLocker,
+        ensure_locked,
+        ensure_write_access,
+        get_lock_backend,
+        iter_locked,
+        locked_read_file,
+        make_all_lock_paths,
+        make_locker,
+        read_lock,
+        register_lock_backend,
+        set_lock_backend,
+        wait_for_locks,
+        write_lock,
+    )
+    from .files import (
+        checksum,
+        create_file_racefree,
+        create_lock,
+        filesize_to_str,
+        make_lock_path,
+        remove_lock,
+        size,
+        untar,
+        wait_for_lock,
+    )
+    from .paths import (
+        RegistryIndex,
+        expandpath,
+        mkabs,
+        mkabs_many,
+        parse_registry_path,
+        parse_registry_path_columns,
+        parse_registry_path_strict,
+        parse_registry_paths,
+    )
+    from .system import check_writable_many, is_command_callable, is_writable, which_many
+    from .time import parse_timedelta, parse_timedeltas
+    from .web import (
+        classify_paths,
+        get_scheme_handler,
+        has_scheme,
+        is_url,
+        register_scheme_handler,
+    )
 
 __all__ = [
+    "check_writable_many",
     "checksum",
+    "classify_paths",
     "convert_value",
+    "convert_values",
     "create_file_racefree",
     "create_lock",
+    "decode_mask",
+    "deep_merge",
     "deep_update",
     "ensure_locked",
     "ensure_write_access",
     "expandpath",
     "filesize_to_str",
+    "FlockLocker",
+    "get_lock_backend",
+    "get_scheme_handler",
     "has_scheme",
+    "ipowerset",
     "is_collection_like",
     "is_command_callable",
     "is_url",
     "is_writable",
+    "iter_locked",
+    "iuniqify",
     "locked_read_file",
     "make_all_lock_paths",
     "make_lock_path",
+    "make_locker",
     "merge_dicts",
+    "merge_many",
     "mkabs",
+    "mkabs_many",
+    "NoopLocker",
+    "nth_subset",
     "OneLocker",
     "parse_registry_path",
+    "parse_registry_path_columns",
     "parse_timedelta",
+    "parse_timedeltas",
     "parse_registry_path_strict",
+    "parse_registry_paths",
     "powerset",
+    "powerset_chunks",
+    "powerset_masks",
     "query_yes_no",
     "READ",
     "read_lock",
+    "register_lock_backend",
+    "register_scheme_handler",
+    "RegistryIndex",
     "remove_lock",
+    "ScopedEnv",
+    "scoped_environ",
+    "scoped_getenv",
+    "set_lock_backend",
     "size",
     "ThreeLocker",
     "TmpEnv",
@@ -78,6 +152,113 @@ __all__ = [
     "VersionInHelpParser",
     "wait_for_lock",
     "wait_for_locks",
+    "which_many",
     "WRITE",
     "write_lock",
 ]
+
+# Public names, by the submodule defining them
+_EXPORTS = {
+    "cli_tools": (
+        "VersionInHelpParser",
+        "convert_value",
+        "convert_values",
+        "query_yes_no",
+    ),
+    "collection": (
+        "decode_mask",
+        "deep_merge",
+        "deep_update",
+        "ipowerset",
+        "is_collection_like",
+        "iuniqify",
+        "merge_dicts",
+        "merge_many",
+        "nth_subset",
+        "powerset",
+        "powerset_chunks",
+        "powerset_masks",
+        "uniqify",
+    ),
+    "environment": (
+        "ScopedEnv",
+        "TmpEnv",
+        "scoped_environ",
+        "scoped_getenv",
+    ),
+    "file_locking": (
+        "READ",
+        "WRITE",
+        "FlockLocker",
+        "NoopLocker",
+        "OneLocker",
+        "ThreeLocker",
+        "ensure_locked",
+        "ensure_write_access",
+        "get_lock_backend",
+        "iter_locked",
+        "locked_read_file",
+        "make_all_lock_paths",
+        "make_locker",
+        "read_lock",
+        "register_lock_backend",
+        "set_lock_backend",
+        "wait_for_locks",
+        "write_lock",
+    ),
+    "files": (
+        "checksum",
+        "create_file_racefree",
+        "create_lock",
+        "filesize_to_str",
+        "make_lock_path",
+        "remove_lock",
+        "size",
+        "untar",
+        "wait_for_lock",
+    ),
+    "paths": (
+        "RegistryIndex",
+        "expandpath",
+        "mkabs",
+        "mkabs_many",
+        "parse_registry_path",
+        "parse_registry_path_columns",
+        "parse_registry_path_strict",
+        "parse_registry_paths",
+    ),
+    "system": (
+        "check_writable_many",
+        "is_command_callable",
+        "is_writable",
+        "which_many",
+    ),
+    "time": (
+        "parse_timedelta",
+        "parse_timedeltas",
+    ),
+    "web": (
+        "classify_paths",
+        "get_scheme_handler",
+        "has_scheme",
+        "is_url",
+        "register_scheme_handler",
+    ),
+}
+_EXPORT_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+def __getattr__(name: str) -> object:
+    if name in _EXPORTS:  # a submodule, e.g. ubiquerg.paths
+        return _importlib.import_module(f".{name}", __name__)
+    try:
+        module = _EXPORT_MODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(_importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__) | set(_EXPORTS))
@@ -1,25 +1,52 @@
 """Functions for working with command-line interaction"""
 
+import itertools
+import re
 import sys
 from argparse import (
     SUPPRESS,
+    ArgumentError,
     ArgumentParser,
     _HelpAction,
     _SubParsersAction,
     _VersionAction,
 )
+from array import array
+from collections.abc import Callable, Iterable
 from typing import Any
 
-from .collection import merge_dicts
+from .collection import merge_many
 
 __classes__ = ["VersionInHelpParser"]
-__all__ = __classes__ + ["query_yes_no", "convert_value"]
+__all__ = __classes__ + ["query_yes_no", "convert_value", "convert_values"]
+
+# Strings accepted by int() and float(): optional surrounding whitespace and
+# sign, digits optionally grouped by single underscores. int() and float()
+# don't strip the separator characters \x1c-\x1f, though str.isspace() and \s
+# count them as whitespace.
+_DIGITS = r"\d(?:_?\d)*"
+_SPACE = r"[^\S\x1c-\x1f]*"
+_INT_REGEX = re.compile(rf"{_SPACE}[+-]?{_DIGITS}{_SPACE}")
+_FLOAT_REGEX = re.compile(
+    rf"{_SPACE}[+-]?(?:(?:(?:{_DIGITS})?\.{_DIGITS}|{_DIGITS}\.?)(?:e[+-]?{_DIGITS})?"
+    rf"|inf(?:inity)?|nan){_SPACE}",
+    re.IGNORECASE,
+)
+_NONFINITE_INITIALS = frozenset("iInN")
+# int() may refuse longer digit strings, depending on sys.set_int_max_str_digits
+_MIN_INT_MAX_STR_DIGITS = 640
+# convert_values keeps memoizing past this many values only if at least
+# half of them were repeats
+_MEMO_SAMPLE_SIZE = 1024
 
 
 class VersionInHelpParser(ArgumentParser):
     def __init__(self, version: str | None = None, **kwargs: Any) -> None:
         """Overwrites the inherited init. Saves the version as an object attribute for further use."""
+        self._introspection: _ParserIndex | None = None
+        self._parent_parser: VersionInHelpParser | None = None
         super(VersionInHelpParser, self).__init__(**kwargs)
+        self.register("action", "parsers", _IndexedSubParsersAction)
         self.version = version
         if self.version is not None:
             self.add_argument(
@@ -33,16 +60,28 @@ class VersionInHelpParser(ArgumentParser):
         help_string = "version: {}\n".format(str(self.version)) if self.version is not None else ""
         return help_string + super(VersionInHelpParser, self).format_help()
 
+    def add_subparsers(self, **kwargs: Any) -> _SubParsersAction:
+        """Add subparsers, linking the parsers they create back to this one."""
+        action = super(VersionInHelpParser, self).add_subparsers(**kwargs)
+        if isinstance(action, _IndexedSubParsersAction):
+            action._parent_parser = self
+        return action
+
+    def set_defaults(self, **kwargs: Any) -> None:
+        """Set parser-level defaults, as ArgumentParser.set_defaults does."""
+        super(VersionInHelpParser, self).set_defaults(**kwargs)
+        self._invalidate_introspection()
+
     def subparsers(self) -> _SubParsersAction:
         """Get the subparser associated with a parser.
 
         Returns:
             argparse._SubparsersAction: action defining the subparsers
         """
-        subs = [a for a in self._actions if isinstance(a, _SubParsersAction)]
-        if len(subs) != 1:
-            raise ValueError("Expected exactly 1 subparser, got {}".format(len(subs)))
-        return subs[0]
+        index = self._index()
+        if len(index.subparsers) != 1:
+            raise ValueError("Expected exactly 1 subparser, got {}".format(len(index.subparsers)))
+        return index.subparsers[0]
 
     def top_level_args(self) -> list[Any]:
         """Get actions not associated with any subparser.
@@ -52,8 +91,7 @@ class VersionInHelpParser(ArgumentParser):
         Returns:
             list[argparse.<action_type>]: list of argument actions
         """
-        excl = [_SubParsersAction, _HelpAction, _VersionAction]
-        return [a for a in self._actions if not isinstance(a, tuple(excl))]
+        return list(self._index().top_level)
 
     def subcommands(self) -> list[str]:
         """Get subcommands defined by a parser.
@@ -74,35 +112,12 @@ class VersionInHelpParser(ArgumentParser):
         Returns:
             dict: dests by subcommand
         """
+        index = self._index()
         if top_level:
-            top_level_actions = self.top_level_args()
-            dest_list = []
-            for tla in top_level_actions:
-                if hasattr(tla, "dest"):
-                    dest_list.append(tla.dest)
-            return dest_list
-
-        if subcommand is not None and subcommand not in self.subcommands():
-            raise ValueError(
-                "'{}' not found in this parser commands: {}".format(
-                    subcommand, str(self.subcommands())
-                )
-            )
-        subs = (
-            self.subparsers().choices
-            if subcommand is None
-            else {subcommand: self.subparsers().choices[subcommand]}
-        )
-        dests = {}
-        for subcmd, sub in subs.items():
-            dest_list: list[str] = []
-            for action in sub._actions:
-                if isinstance(action, _HelpAction):
-                    continue
-                if hasattr(action, "dest"):
-                    dest_list.append(action.dest)
-            dests[subcmd] = dest_list
-        return dests
+            return [tla.dest for tla in index.top_level if hasattr(tla, "dest")]
+        self._check_subcommand(subcommand)
+        dests = index.dests(subcommand)
+        return {subcmd: list(dest_list) for subcmd, dest_list in dests.items()}
 
     def suppress_defaults(self) -> None:
         """Remove parser change defaults to argparse.SUPPRESS.
@@ -118,6 +133,9 @@ class VersionInHelpParser(ArgumentParser):
             for sa in sub._actions:
                 if hasattr(sa, "dest"):
                     sa.default = SUPPRESS
+            if isinstance(sub, VersionInHelpParser):
+                sub._introspection = None
+        self._invalidate_introspection()
 
     def arg_defaults(
         self,
@@ -134,40 +152,220 @@ class VersionInHelpParser(ArgumentParser):
         Returns:
             dict: defaults by subcommand
         """
+        index = self._index()
         if top_level:
-            top_level_actions = self.top_level_args()
-            defaults_dict = {}
-            for tla in top_level_actions:
-                if hasattr(tla, "default") and hasattr(tla, "dest"):
-                    defaults_dict.update({tla.dest: tla.default})
-            return defaults_dict
-
-        if subcommand is not None and subcommand not in self.subcommands():
+            return {
+                tla.dest: tla.default
+                for tla in index.top_level
+                if hasattr(tla, "default") and hasattr(tla, "dest")
+            }
+        self._check_subcommand(subcommand)
+        if subcommand is None and unique:
+            return dict(index.unique_defaults())
+        defaults = index.defaults(subcommand)
+        if unique:
+            return merge_many(*defaults.values(), deep=False)
+        return {subcmd: dict(defaults_dict) for subcmd, defaults_dict in defaults.items()}
+
+    def _check_subcommand(self, subcommand: str | None) -> None:
+        choices = self.subparsers().choices
+        if subcommand is not None and subcommand not in choices:
             raise ValueError(
                 "'{}' not found in this parser commands: {}".format(
                     subcommand, str(self.subcommands())
                 )
             )
-        subs = (
-            self.subparsers().choices
-            if subcommand is None
-            else {subcommand: self.subparsers().choices[subcommand]}
+
+    def _index(self) -> "_ParserIndex":
+        """Get the introspection index, rebuilding it if the parser has changed.
+
+        Adding arguments (also via argument groups) or subcommands is detected,
+        as is set_defaults on this parser or its VersionInHelpParser
+        subcommands; modifying an action's attributes directly is not.
+        """
+        index = self._introspection
+        if index is None or not index.is_current(self):
+            index = self._introspection = _ParserIndex(self)
+        return index
+
+    def _invalidate_introspection(self) -> None:
+        parser = self
+        while parser is not None:
+            parser._introspection = None
+            parser = parser._parent_parser
+
+
+class _IndexedSubParsersAction(_SubParsersAction):
+    """Subparsers action that links each parser it creates to the parent parser.
+
+    Subcommands may also be declared lazily with add_lazy_parser, in which
+    case the parser is only built when it's first looked up, e.g. when it's
+    selected while parsing arguments.
+    """
+
+    _parent_parser: VersionInHelpParser | None = None
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(_IndexedSubParsersAction, self).__init__(*args, **kwargs)
+        self._name_parser_map = self.choices = _LazyParserMap(self)
+
+    def add_parser(self, name: str, **kwargs: Any) -> ArgumentParser:
+        parser = super(_IndexedSubParsersAction, self).add_parser(name, **kwargs)
+        if isinstance(parser, VersionInHelpParser):
+            parser._parent_parser = self._parent_parser
+        return parser
+
+    def add_lazy_parser(
+        self, name: str, factory: Callable[[ArgumentParser], Any], **kwargs: Any
+    ) -> None:
+        """Declare a subcommand whose parser is built only when it's needed.
+
+        Args:
+            name: name of the subcommand
+            factory: function adding the subcommand's arguments to its newly created parser
+            kwargs: keyword arguments for add_parser, e.g. help or aliases
+        """
+        aliases = kwargs.get("aliases", ())
+        for key in (name, *aliases):
+            if key in self._name_parser_map:
+                raise ArgumentError(self, "conflicting subparser: {}".format(key))
+        if "help" in kwargs:
+            kwargs = dict(kwargs)
+            help = kwargs.pop("help")
+            self._choices_actions.append(self._ChoicesPseudoAction(name, aliases, help))
+        pending = _PendingParser(name, factory, kwargs)
+        for key in (name, *aliases):
+            dict.__setitem__(self._name_parser_map, key, pending)
+        if self._parent_parser is not None:
+            self._parent_parser._invalidate_introspection()
+
+    def _build(self, pending: "_PendingParser") -> ArgumentParser:
+        parsers = self._name_parser_map
+        order = list(parsers)
+        for key in (pending.name, *pending.kwargs.get("aliases", ())):
+            dict.__delitem__(parsers, key)
+        parser = self.add_parser(pending.name, **pending.kwargs)
+        pending.factory(parser)
+        built = [(key, dict.__getitem__(parsers, key)) for key in order]
+        dict.clear(parsers)
+        dict.update(parsers, built)
+        return parser
+
+
+class _PendingParser:
+    """Placeholder for a lazily declared subcommand parser."""
+
+    __slots__ = ("name", "factory", "kwargs")
+
+    def __init__(
+        self, name: str, factory: Callable[[ArgumentParser], Any], kwargs: dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.kwargs = kwargs
+
+
+class _LazyParserMap(dict):
+    """Subcommand name to parser mapping that builds lazily declared parsers on access."""
+
+    def __init__(self, action: _IndexedSubParsersAction) -> None:
+        super(_LazyParserMap, self).__init__()
+        self._action = action
+
+    def __getitem__(self, name: str) -> ArgumentParser:
+        parser = super(_LazyParserMap, self).__getitem__(name)
+        if isinstance(parser, _PendingParser):
+            parser = self._action._build(parser)
+        return parser
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+    def values(self) -> list[ArgumentParser]:  # type: ignore[override]
+        return [self[name] for name in self]
+
+    def items(self) -> list[tuple[str, ArgumentParser]]:  # type: ignore[override]
+        return [(name, self[name]) for name in self]
+
+
+class _ParserIndex:
+    """Snapshot of a parser's actions, with subcommand dests and defaults computed on first use."""
+
+    __slots__ = (
+        "subparsers",
+        "top_level",
+        "_n_actions",
+        "_n_sub_actions",
+        "_dests",
+        "_defaults",
+        "_unique_defaults",
+    )
+
+    def __init__(self, parser: ArgumentParser) -> None:
+        excl = (_SubParsersAction, _HelpAction, _VersionAction)
+        self.subparsers = [a for a in parser._actions if isinstance(a, _SubParsersAction)]
+        self.top_level = [a for a in parser._actions if not isinstance(a, excl)]
+        self._n_actions = len(parser._actions)
+        self._n_sub_actions = self._count_sub_actions()
+        self._dests: dict[str, list[str]] = {}
+        self._defaults: dict[str, dict[str, Any]] = {}
+        self._unique_defaults: dict[str, Any] | None = None
+
+    def is_current(self, parser: ArgumentParser) -> bool:
+        return (
+            len(parser._actions) == self._n_actions
+            and self._count_sub_actions() == self._n_sub_actions
         )
-        defaults = {}
-        for subcmd, sub in subs.items():
-            defaults_dict = {}
-            for action in sub._actions:
-                if isinstance(action, _HelpAction):
-                    continue
-                if hasattr(action, "default") and hasattr(action, "dest"):
-                    defaults_dict.update({action.dest: action.default})
-            defaults[subcmd] = defaults_dict
-        if unique:
-            unique_defaults = {}
-            for k, v in defaults.items():
-                unique_defaults = merge_dicts(unique_defaults, v)
-            return unique_defaults
-        return defaults
+
+    def _count_sub_actions(self) -> tuple[int, int]:
+        if len(self.subparsers) != 1:
+            return 0, 0
+        choices = self.subparsers[0].choices
+        built = (sub for sub in dict.values(choices) if not isinstance(sub, _PendingParser))
+        return len(choices), sum(len(sub._actions) for sub in built)
+
+    def dests(self, subcommand: str | None = None) -> dict[str, list[str]]:
+        dests = self._dests
+        for subcmd, sub in self._pending(dests, subcommand):
+            dests[subcmd] = [
+                action.dest
+                for action in sub._actions
+                if not isinstance(action, _HelpAction) and hasattr(action, "dest")
+            ]
+        return self._select(dests, subcommand)
+
+    def defaults(self, subcommand: str | None = None) -> dict[str, dict[str, Any]]:
+        defaults = self._defaults
+        for subcmd, sub in self._pending(defaults, subcommand):
+            defaults[subcmd] = {
+                action.dest: action.default
+                for action in sub._actions
+                if not isinstance(action, _HelpAction)
+                and hasattr(action, "default")
+                and hasattr(action, "dest")
+            }
+        return self._select(defaults, subcommand)
+
+    def _pending(
+        self, done: dict[str, Any], subcommand: str | None
+    ) -> list[tuple[str, ArgumentParser]]:
+        """Subcommands (all, or the given one) not yet indexed, with their parsers.
+
+        Parsers of lazily declared subcommands are built here.
+        """
+        choices = self.subparsers[0].choices
+        names = list(choices) if subcommand is None else [subcommand]
+        return [(name, choices[name]) for name in names if name not in done]
+
+    def _select(self, done: dict[str, Any], subcommand: str | None) -> dict[str, Any]:
+        if subcommand is not None:
+            return {subcommand: done[subcommand]}
+        return {subcmd: done[subcmd] for subcmd in self.subparsers[0].choices}
+
+    def unique_defaults(self) -> dict[str, Any]:
+        if self._unique_defaults is None:
+            self._unique_defaults = merge_many(*self.defaults().values(), deep=False)
+        return self._unique_defaults
 
 
 def query_yes_no(question: str, default: str = "no") -> bool:
@@ -223,17 +421,101 @@ def convert_value(val: Any) -> bool | str | int | float | None:
             )
 
     # val is definitely a string at this point
+    return _convert_str(val)
+
+
+def convert_values(
+    values: Iterable[Any], as_array: bool = False
+) -> list[bool | str | int | float | None] | array:
+    """Convert a column of strings, each to the most appropriate type.
+
+    Each value is converted as by convert_value, but strings are classified
+    with precompiled patterns rather than by trying int() and float() in turn.
+    If at least half of the first 1024 values are repeats, as in a column of
+    categories, flags or small counts, each distinct string is converted once,
+    which is several times faster than calling convert_value on each.
+    Otherwise every string is converted anew, which is still somewhat faster.
+
+    Args:
+        values: the strings (or other values) to convert
+        as_array: whether to return a typed array when the whole column is
+            numeric: array('q') if every value is an int within 64 bits, else
+            array('d') if every value is an int or float. The array supports
+            the buffer protocol, so e.g. numpy.asarray can wrap it without a copy.
+
+    Returns:
+        list[bool | str | int | float | None] | array.array: converted values;
+            a list if not as_array or the column isn't numeric
+    """
+    converted = {}
+    result = []
+    append = result.append
+    values = iter(values)
+    repeats = _convert_memoized(itertools.islice(values, _MEMO_SAMPLE_SIZE), converted, append)
+    if repeats * 2 >= len(result):
+        _convert_memoized(values, converted, append)
+    else:  # mostly distinct values, so lookups would only cost time
+        for val in values:
+            append(_convert_str(val) if type(val) is str else convert_value(val))
+    if not as_array:
+        return result
+    types = set(map(type, result))
+    if types == {int}:
+        try:
+            return array("q", result)
+        except OverflowError:
+            pass
+    if types and types <= {int, float}:
+        try:
+            return array("d", result)
+        except OverflowError:
+            pass
+    return result
+
+
+def _convert_memoized(
+    values: Iterable[Any], converted: dict[str, Any], append: Callable[[Any], None]
+) -> int:
+    """Append converted values, converting each distinct string once; returns the repeats."""
+    repeats = 0
+    for val in values:
+        if type(val) is str:
+            value = converted.get(val, converted)  # the dict itself marks a miss
+            if value is converted:
+                value = converted[val] = _convert_str(val)
+            else:
+                repeats += 1
+            append(value)
+        else:
+            append(convert_value(val))
+    return repeats
+
+
+def _convert_str(val: str) -> bool | str | int | float | None:
+    """Convert a string to None, bool, int, float or itself, in a single pass.
+
+    Only strings that int() or float() would accept are passed to them, so
+    ordinary words are returned without raising any exceptions.
+    """
     if val == "None":
         return None
-    if val.lower() == "true":
-        return True
-    if val.lower() == "false":
-        return False
-
-    try:
-        return int(val)
-    except ValueError:
+    if len(val) in (4, 5):
+        lowered = val.lower()
+        if lowered == "true":
+            return True
+        if lowered == "false":
+            return False
+    # Words that can't be "inf"/"nan" don't need the patterns.
+    first = val[:1]
+    if first.isalpha() and first not in _NONFINITE_INITIALS:
+        return val
+    if _INT_REGEX.fullmatch(val):
+        if len(val) < _MIN_INT_MAX_STR_DIGITS:
+            return int(val)
         try:
+            return int(val)
+        except ValueError:  # beyond the int string conversion length limit
             return float(val)
-        except ValueError:
-            return val
+    if _FLOAT_REGEX.fullmatch(val):
+        return float(val)
+    return val
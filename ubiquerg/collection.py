@@ -1,7 +1,11 @@
 """Tools for working with collections"""
 
 import itertools
-from collections.abc import Iterable, Mapping
+import math
+import operator
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from typing import Any, TypeVar
 
 T = TypeVar("T")
@@ -9,15 +13,28 @@ T = TypeVar("T")
 __author__ = "Vince Reuter"
 __email__ = "vreuter@virginia.edu"
 
+# Most masks ipowerset builds in advance per subset size when generating bitmasks
+_MASK_TABLE_SIZE = 1 << 16
+
 
 __all__ = [
     "is_collection_like",
     "powerset",
+    "ipowerset",
+    "nth_subset",
+    "powerset_chunks",
+    "powerset_masks",
+    "decode_mask",
     "merge_dicts",
     "deep_update",
+    "deep_merge",
+    "merge_many",
     "uniqify",
+    "iuniqify",
 ]
 
+LIST_MERGE_STRATEGIES = ("replace", "extend", "unique")
+
 
 def merge_dicts(x: dict[Any, Any], y: dict[Any, Any]) -> dict[Any, Any]:
     """Merge dictionaries.
@@ -34,18 +51,170 @@ def merge_dicts(x: dict[Any, Any], y: dict[Any, Any]) -> dict[Any, Any]:
     return z
 
 
-def deep_update(old: dict[Any, Any], new: Mapping[Any, Any]) -> None:
+def deep_update(old: dict[Any, Any], new: Mapping[Any, Any], max_depth: int | None = None) -> None:
     """Recursively update nested dict, modifying in place.
 
+    Nesting is walked with an explicit stack rather than recursion, so
+    arbitrarily deep inputs don't hit the interpreter's recursion limit.
+
     Args:
         old: dict to update
         new: dict with new values
+        max_depth: nesting level (1 being the top level) past which mappings
+            are replaced rather than merged; no limit by default
     """
-    for key, value in new.items():
-        if isinstance(value, Mapping) and value and isinstance(old.get(key), Mapping):
-            deep_update(old[key], value)
-        else:
-            old[key] = new[key]
+    _merge_into(old, new, None, "replace", max_depth)
+
+
+def deep_merge(
+    old: Mapping[Any, Any],
+    new: Mapping[Any, Any],
+    list_strategy: str = "replace",
+    max_depth: int | None = None,
+) -> dict[Any, Any]:
+    """Deep-merge two mappings into a new dict, leaving both inputs unchanged.
+
+    Values from `new` take precedence, with nested mappings merged as in
+    deep_update. Only the nested dicts that actually change are copied; all
+    other values are shared with the inputs.
+
+    Args:
+        old: mapping with base values
+        new: mapping with values to merge on top
+        list_strategy: how to merge a list in `new` with a list in `old` under the
+            same key: 'replace' it, 'extend' it, or extend it with only the 'unique'
+            items not already present
+        max_depth: nesting level (1 being the top level) past which mappings
+            are replaced rather than merged; no limit by default
+
+    Returns:
+        dict: merged mapping
+
+    Raises:
+        ValueError: if the list merge strategy is unknown
+    """
+    if list_strategy not in LIST_MERGE_STRATEGIES:
+        raise ValueError(
+            f"Unknown list merge strategy: '{list_strategy}'. Use one of: {LIST_MERGE_STRATEGIES}"
+        )
+    merged = dict(old)
+    _merge_into(merged, new, {id(merged)}, list_strategy, max_depth)
+    return merged
+
+
+def merge_many(
+    *mappings: Mapping[Any, Any], deep: bool = True, lazy: bool = False
+) -> Mapping[Any, Any]:
+    """Merge any number of mappings in a single pass, later ones taking precedence.
+
+    Meant for layered configuration (e.g. defaults, site, user, project, CLI):
+    the result is built once rather than by chaining pairwise merges that copy
+    intermediate dicts. None of the inputs are modified.
+
+    Args:
+        *mappings: mappings to merge, from lowest to highest precedence
+        deep: whether to merge nested mappings as deep_update does, rather than
+            letting a later value replace an earlier one outright
+        lazy: whether to return a read-only view that looks keys up in the
+            layers on demand, instead of copying anything
+
+    Returns:
+        Mapping: merged dict, or a read-only mapping view of the layers if lazy
+    """
+    if lazy:
+        return _LayeredMapping(mappings[::-1], deep)
+    merged = {}
+    if not deep:
+        for mapping in mappings:
+            merged.update(mapping)
+        return merged
+    owned = {id(merged)}
+    for mapping in mappings:
+        _merge_into(merged, mapping, owned, "replace", None)
+    return merged
+
+
+class _LayeredMapping(Mapping):
+    """Read-only view of layered mappings, resolving each key on access.
+
+    Like collections.ChainMap, the first map has the highest precedence. When
+    deep, a nested mapping found in several layers is itself returned as a
+    layered view, with the same replace rules as deep_update.
+    """
+
+    __slots__ = ("maps", "deep")
+
+    def __init__(self, maps: Sequence[Mapping[Any, Any]], deep: bool = True) -> None:
+        self.maps = list(maps)
+        self.deep = deep
+
+    def __getitem__(self, key: Any) -> Any:
+        found = []
+        for mapping in self.maps:
+            if key not in mapping:
+                continue
+            value = mapping[key]
+            if not (self.deep and value and _is_mapping(value)):
+                if not found:
+                    return value
+                break  # a scalar or empty mapping below is replaced by the ones above
+            found.append(value)
+        if not found:
+            raise KeyError(key)
+        return found[0] if len(found) == 1 else _LayeredMapping(found, self.deep)
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in mapping for mapping in self.maps)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(dict.fromkeys(itertools.chain.from_iterable(reversed(self.maps))))
+
+    def __len__(self) -> int:
+        return len(set().union(*self.maps))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.maps!r})"
+
+
+def _is_mapping(value: Any) -> bool:
+    # exact dicts are by far the most common; skip the slower ABC check for them
+    return type(value) is dict or isinstance(value, Mapping)
+
+
+def _merge_into(
+    target: dict[Any, Any],
+    new: Mapping[Any, Any],
+    owned: set[int] | None,
+    list_strategy: str,
+    max_depth: int | None,
+) -> None:
+    """Merge `new` into `target` without recursion.
+
+    With `owned` as None, nested dicts are updated in place; otherwise it holds
+    the ids of the dicts created for this merge, and any other nested dict is
+    copied before it's modified.
+    """
+    stack = [(target, new, 1)]
+    while stack:
+        target, new, depth = stack.pop()
+        merge_deeper = max_depth is None or depth < max_depth
+        for key, value in new.items():
+            if merge_deeper and value and _is_mapping(value):
+                current = target.get(key)
+                if _is_mapping(current):
+                    if owned is not None and id(current) not in owned:
+                        current = dict(current)
+                        owned.add(id(current))
+                        target[key] = current
+                    stack.append((current, value, depth + 1))
+                    continue
+            elif list_strategy != "replace" and type(value) is list:
+                current = target.get(key)
+                if type(current) is list:
+                    if list_strategy == "unique":
+                        value = [x for x in value if x not in current]
+                    value = current + value
+            target[key] = value
 
 
 def is_collection_like(c: Any) -> bool:
@@ -63,6 +232,9 @@ def is_collection_like(c: Any) -> bool:
 def uniqify(seq: list[T]) -> list[T]:  # Dave Kirby
     """Return only unique items in a sequence, preserving order.
 
+    Unhashable items (e.g. dicts or lists) are compared by structure, as in
+    iuniqify.
+
     Args:
         seq: List of items to uniqify
 
@@ -71,8 +243,79 @@ def uniqify(seq: list[T]) -> list[T]:  # Dave Kirby
     """
     # Order preserving
     seen = set()
-    # Use list comprehension for speed
-    return [x for x in seq if x not in seen and not seen.add(x)]  # type: ignore[func-returns-value]
+    try:
+        # Use list comprehension for speed
+        return [x for x in seq if x not in seen and not seen.add(x)]  # type: ignore[func-returns-value]
+    except TypeError:
+        return list(iuniqify(seq))
+
+
+def iuniqify(
+    iterable: Iterable[T], key: Callable[[T], Any] | None = None, max_seen: int | None = None
+) -> Iterator[T]:
+    """Lazily yield the unique items of an iterable, preserving order.
+
+    Unhashable items (or keys) such as dicts and lists are compared by
+    structure: mappings by their items, sequences by their elements.
+
+    Args:
+        iterable: items to uniqify
+        key: function computing the value by which items are compared; the item itself by default
+        max_seen: remember at most this many of the most recently seen keys, to bound memory
+            on long streams; an item whose key was forgotten is yielded again
+
+    Returns:
+        Iterator[object]: first occurrence of each distinct item
+
+    Raises:
+        ValueError: if max_seen isn't positive
+    """
+    if max_seen is not None and max_seen < 1:
+        raise ValueError(f"Max seen keys count must be positive, got {max_seen}")
+    return _iuniqify(iterable, key, max_seen)
+
+
+def _iuniqify(
+    iterable: Iterable[T], key: Callable[[T], Any] | None, max_seen: int | None
+) -> Iterator[T]:
+    if max_seen is None:
+        seen = set()
+        for item in iterable:
+            k = _freeze(item if key is None else key(item))
+            if k not in seen:
+                seen.add(k)
+                yield item
+        return
+    recent = OrderedDict()
+    for item in iterable:
+        k = _freeze(item if key is None else key(item))
+        if k in recent:
+            recent.move_to_end(k)
+            continue
+        recent[k] = None
+        if len(recent) > max_seen:
+            recent.popitem(last=False)
+        yield item
+
+
+_FROZEN_MAPPING = object()
+_FROZEN_SEQUENCE = object()
+
+
+def _freeze(value: Any) -> Any:
+    """Make a hashable stand-in for a value, equal for structurally equal values."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    if isinstance(value, Mapping):
+        return _FROZEN_MAPPING, frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, Iterable):
+        return _FROZEN_SEQUENCE, type(value), tuple(_freeze(v) for v in value)
+    raise TypeError(f"Can't compare unhashable value by structure: {type(value)}")
 
 
 def powerset(
@@ -80,6 +323,7 @@ def powerset(
     min_items: int | None = None,
     include_full_pop: bool = True,
     nonempty: bool = False,
+    max_items: int | None = None,
 ) -> list[tuple[T, ...]]:
     """Build the powerset of a collection of items.
 
@@ -88,14 +332,202 @@ def powerset(
         min_items: Minimum number of individuals from the population to allow in any given subset
         include_full_pop: Whether to include the full population in the powerset (default True to accord with genuine definition)
         nonempty: force each subset returned to be nonempty
+        max_items: Maximum number of individuals from the population to allow in any given subset
 
     Returns:
         list[object]: Sequence of subsets of the population, in nondecreasing size order
 
     Raises:
-        TypeError: if minimum item count is specified but is not an integer
+        TypeError: if minimum or maximum item count is specified but is not an integer
         ValueError: if minimum item count is insufficient to guarantee nonempty subsets
     """
+    return list(ipowerset(items, min_items, include_full_pop, nonempty, max_items))
+
+
+def ipowerset(
+    items: Iterable[T],
+    min_items: int | None = None,
+    include_full_pop: bool = True,
+    nonempty: bool = False,
+    max_items: int | None = None,
+    start: int = 0,
+    stop: int | None = None,
+    as_masks: bool = False,
+) -> Iterator[tuple[T, ...]] | Iterator[int]:
+    """Lazily generate the powerset of a collection of items.
+
+    Subsets come in the same order as from powerset: by nondecreasing size,
+    and in lexicographic order of item positions within a size. `start` and
+    `stop` select a slice of that sequence without generating the subsets
+    before it, so that ranges (see powerset_chunks) can be handed to separate
+    workers. With `as_masks`, each subset is an int with bit i set when the
+    i-th item is in it (see decode_mask), rather than a tuple of items.
+
+    Args:
+        items: "Pool" of all items, the population for which to build the power set
+        min_items: Minimum number of individuals from the population to allow in any given subset
+        include_full_pop: Whether to include the full population in the powerset
+        nonempty: force each subset generated to be nonempty
+        max_items: Maximum number of individuals from the population to allow in any given subset
+        start: position in the powerset of the first subset to generate
+        stop: position in the powerset at which to stop, exclusive; the end by default
+        as_masks: generate integer bitmasks instead of tuples of items
+
+    Returns:
+        Iterator[tuple] | Iterator[int]: subsets of the population
+
+    Raises:
+        TypeError: if minimum or maximum item count is specified but is not an integer
+        ValueError: if minimum item count is insufficient to guarantee nonempty subsets,
+            or if start is negative or stop is less than start
+    """
+    if start < 0:
+        raise ValueError(f"Start position must be nonnegative, got {start}")
+    if stop is not None and stop < start:
+        raise ValueError(f"Stop position {stop} is before start position {start}")
+    # Account for iterable burn possibility; besides, collection should be
+    # relatively small if building the powerset.
+    items = tuple(items)
+    sizes = _subset_sizes(len(items), min_items, include_full_pop, nonempty, max_items)
+    if as_masks:
+        subsets = itertools.chain.from_iterable(_mask_runs(len(items), sizes, start))
+    else:
+        subsets = _iter_subsets(items, sizes, start)
+    return subsets if stop is None else itertools.islice(subsets, stop - start)
+
+
+def powerset_masks(
+    items: Iterable[T],
+    min_items: int | None = None,
+    include_full_pop: bool = True,
+    nonempty: bool = False,
+    max_items: int | None = None,
+) -> array:
+    """Build the powerset of a collection of items as a compact array of bitmasks.
+
+    Each mask uses 8 bytes, whereas a tuple costs a header plus a reference
+    per item. Bit i of a mask is set when the i-th item is in the subset; the
+    order matches powerset.
+
+    Args:
+        items: "Pool" of all items, the population for which to build the power set
+        min_items: Minimum number of individuals from the population to allow in any given subset
+        include_full_pop: Whether to include the full population in the powerset
+        nonempty: force each subset to be nonempty
+        max_items: Maximum number of individuals from the population to allow in any given subset
+
+    Returns:
+        array: unsigned 64-bit ('Q') bitmasks of the subsets
+
+    Raises:
+        ValueError: if there are more than 64 items
+    """
+    items = tuple(items)
+    if len(items) > 64:
+        raise ValueError(f"Too many items for 64-bit masks: {len(items)}")
+    return array(
+        "Q", ipowerset(items, min_items, include_full_pop, nonempty, max_items, as_masks=True)
+    )
+
+
+def decode_mask(items: Sequence[T], mask: int) -> tuple[T, ...]:
+    """Get the items in the subset encoded by a bitmask.
+
+    Args:
+        items: the population the mask was built from, in the same order
+        mask: bitmask with bit i set when the i-th item is in the subset
+
+    Returns:
+        tuple: items in the subset, in population order
+
+    Raises:
+        ValueError: if the mask is negative or refers to positions beyond the items
+    """
+    if mask < 0 or mask >> len(items):
+        raise ValueError(f"Mask {mask:#x} is invalid for {len(items)} items")
+    subset = []
+    while mask:
+        low = mask & -mask
+        subset.append(items[low.bit_length() - 1])
+        mask ^= low
+    return tuple(subset)
+
+
+def nth_subset(
+    items: Iterable[T],
+    k: int,
+    min_items: int | None = None,
+    include_full_pop: bool = True,
+    nonempty: bool = False,
+    max_items: int | None = None,
+) -> tuple[T, ...]:
+    """Get the subset at a position in the powerset, without generating the ones before it.
+
+    Args:
+        items: "Pool" of all items, the population for which to build the power set
+        k: position of the subset in the powerset order (as from powerset)
+        min_items: Minimum number of individuals from the population to allow in any given subset
+        include_full_pop: Whether to include the full population in the powerset
+        nonempty: force each subset to be nonempty
+        max_items: Maximum number of individuals from the population to allow in any given subset
+
+    Returns:
+        tuple: the k-th subset
+
+    Raises:
+        IndexError: if the powerset has no subset at position k
+    """
+    items = tuple(items)
+    n = len(items)
+    if k >= 0:
+        for r in _subset_sizes(n, min_items, include_full_pop, nonempty, max_items):
+            count = math.comb(n, r)
+            if k < count:
+                return tuple(items[i] for i in _unrank_combination(n, r, k))
+            k -= count
+    raise IndexError("Powerset position out of range")
+
+
+def powerset_chunks(
+    items: Iterable[T],
+    chunk_size: int,
+    min_items: int | None = None,
+    include_full_pop: bool = True,
+    nonempty: bool = False,
+    max_items: int | None = None,
+) -> Iterator[tuple[int, int]]:
+    """Split the powerset into ranges of positions, e.g. to distribute to workers.
+
+    Each (start, stop) range can be passed to ipowerset with the same items and
+    size settings to generate that chunk of subsets.
+
+    Args:
+        items: "Pool" of all items, the population for which to build the power set
+        chunk_size: number of subsets per chunk
+        min_items: Minimum number of individuals from the population to allow in any given subset
+        include_full_pop: Whether to include the full population in the powerset
+        nonempty: force each subset to be nonempty
+        max_items: Maximum number of individuals from the population to allow in any given subset
+
+    Returns:
+        Iterator[tuple[int, int]]: start (inclusive) and stop (exclusive) positions of each chunk
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    n = len(tuple(items))
+    sizes = _subset_sizes(n, min_items, include_full_pop, nonempty, max_items)
+    total = sum(math.comb(n, r) for r in sizes)
+    return ((i, min(i + chunk_size, total)) for i in range(0, total, chunk_size))
+
+
+def _subset_sizes(
+    n: int,
+    min_items: int | None,
+    include_full_pop: bool,
+    nonempty: bool,
+    max_items: int | None,
+) -> range:
+    """Validate powerset size settings and get the range of subset sizes."""
     if min_items is None:
         min_items = 1 if nonempty else 0
     else:
@@ -111,15 +543,137 @@ def powerset(
                     min_items
                 )
             )
-    # Account for iterable burn possibility; besides, collection should be
-    # relatively small if building the powerset.
-    items = list(items)
-    n = len(items)
-    if n == 0 or n < min_items:
-        return []
-    max_items = len(items) + 1 if include_full_pop else len(items)
-    return list(
-        itertools.chain.from_iterable(
-            itertools.combinations(items, k) for k in range(min_items, max_items)
+    if max_items is not None and not isinstance(max_items, int):
+        raise TypeError(
+            "Max items count for each subset isn't an integer: {} ({})".format(
+                max_items, type(max_items)
+            )
         )
-    )
+    if n == 0 or n < min_items:
+        return range(0)
+    stop = n + 1 if include_full_pop else n
+    if max_items is not None:
+        stop = min(stop, max_items + 1)
+    return range(min_items, stop)
+
+
+def _iter_subsets(items: tuple, sizes: range, start: int) -> Iterator[tuple]:
+    n = len(items)
+    for r in sizes:
+        count = math.comb(n, r)
+        if start >= count:
+            start -= count
+            continue
+        if start:
+            yield from _combinations_from(items, r, start)
+            start = 0
+        else:
+            yield from itertools.combinations(items, r)
+
+
+def _mask_runs(n: int, sizes: range, start: int) -> Iterator[Iterable[int]]:
+    """Like _iter_subsets, with subsets of n items as bitmasks, in consecutive runs."""
+    bits = tuple(1 << i for i in range(n))
+    for r in sizes:
+        count = math.comb(n, r)
+        if start >= count:
+            start -= count
+            continue
+        yield from _mask_runs_from(bits, r, start)
+        start = 0
+
+
+def _mask_runs_from(bits: tuple[int, ...], r: int, k: int) -> Iterator[Iterable[int]]:
+    """Bitmasks of the r-combinations of bits in lexicographic order, from the k-th.
+
+    The first r - s positions of each combination are walked as in
+    _combinations_from, with a running mask; the last s come from a table of
+    precomputed masks. Each run shares the first r - s positions, so no tuple
+    is built per subset, and chaining the runs needs no Python code per subset.
+    """
+    n = len(bits)
+    if r == 0:
+        yield (0,)
+        return
+    # Grow the table while building it stays cheap next to the subsets it serves.
+    limit = min(_MASK_TABLE_SIZE, math.comb(n, r) // 2)
+    s = 1
+    while s < r and sum(math.comb(n - r + s + 1, j) for j in range(2, s + 2)) <= limit:
+        s += 1
+    m = r - s
+    # Masks of the s-combinations of positions m and after, built by extending
+    # each shorter combination with the positions after its last; those of
+    # positions p and after are the last comb(n - p, s).
+    after = [bits[i:] for i in range(n + 1)]
+    table = list(bits[m:])
+    for _ in range(s - 1):
+        table = [x | b for x in table for b in after[x.bit_length()]]
+    size = len(table)
+
+    indices = _unrank_combination(n, r, k)
+    prefix = indices[:m]
+    p = prefix[-1] + 1 if m else 0
+    mask = sum(bits[i] for i in prefix)
+    rank = _rank_combination(n - p, [i - p for i in indices[m:]])
+    yield map(operator.or_, table[size - math.comb(n - p, s) + rank :], itertools.repeat(mask))
+    while True:
+        for i in reversed(range(m)):
+            if prefix[i] != i + n - r:
+                break
+        else:
+            return
+        for j in range(i, m):
+            mask ^= bits[prefix[j]]
+        prefix[i] += 1
+        for j in range(i + 1, m):
+            prefix[j] = prefix[j - 1] + 1
+        for j in range(i, m):
+            mask ^= bits[prefix[j]]
+        run = table[size - math.comb(n - prefix[-1] - 1, s) :]
+        yield map(operator.or_, run, itertools.repeat(mask))
+
+
+def _rank_combination(n: int, indices: list[int]) -> int:
+    """Lexicographic rank of a combination of n items; the inverse of _unrank_combination."""
+    r = len(indices)
+    k = 0
+    x = 0
+    for i, index in enumerate(indices):
+        while x < index:
+            k += math.comb(n - x - 1, r - i - 1)
+            x += 1
+        x += 1
+    return k
+
+
+def _unrank_combination(n: int, r: int, k: int) -> list[int]:
+    """Positions of the k-th r-combination of n items, in lexicographic order."""
+    indices = []
+    x = 0
+    for i in range(r):
+        while True:
+            count = math.comb(n - x - 1, r - i - 1)
+            if k < count:
+                break
+            k -= count
+            x += 1
+        indices.append(x)
+        x += 1
+    return indices
+
+
+def _combinations_from(pool: tuple, r: int, k: int) -> Iterator[tuple]:
+    """Like itertools.combinations(pool, r), starting at the k-th combination."""
+    n = len(pool)
+    indices = _unrank_combination(n, r, k)
+    yield tuple(pool[i] for i in indices)
+    while True:
+        for i in reversed(range(r)):
+            if indices[i] != i + n - r:
+                break
+        else:
+            return
+        indices[i] += 1
+        for j in range(i + 1, r):
+            indices[j] = indices[j - 1] + 1
+        yield tuple(pool[i] for i in indices)
@@ -1,12 +1,23 @@
 """Environment-related utilities"""
 
 import os
-from types import TracebackType
+from collections.abc import Mapping
+from contextvars import ContextVar, Token
+from types import MappingProxyType, TracebackType
 
 __author__ = "Vince Reuter"
 __email__ = "vreuter@virginia.edu"
 
-__all__ = ["TmpEnv"]
+__all__ = ["TmpEnv", "ScopedEnv", "scoped_getenv", "scoped_environ"]
+
+# Overrides in effect in the current context; None marks a variable as unset.
+_ENV_OVERLAY: ContextVar[Mapping[str, str | None]] = ContextVar(
+    "ubiquerg_env_overlay", default=MappingProxyType({})
+)
+# Tokens to undo the ScopedEnv scopes entered in the current context, innermost last.
+# They're kept per context rather than per ScopedEnv, so one instance can be
+# entered by many threads at once.
+_ENV_TOKENS: ContextVar[tuple[Token, ...]] = ContextVar("ubiquerg_env_tokens", default=())
 
 
 class TmpEnv(object):
@@ -45,3 +56,74 @@ class TmpEnv(object):
                     del os.environ[k]
                 except KeyError:
                     pass
+
+
+class ScopedEnv(object):
+    """Temporary environment variable setting, local to the current context.
+
+    Unlike TmpEnv, os.environ is left alone: the overrides live in a
+    contextvars.ContextVar, so concurrent threads or asyncio tasks each see
+    only their own. They apply to scoped_getenv and scoped_environ, e.g.
+    subprocess.run(cmd, env=scoped_environ()). A value of None unsets the
+    variable within the scope. New threads start without overrides, so
+    enter the scope within the task (or run it with contextvars.copy_context).
+    """
+
+    def __init__(self, overwrite: bool = False, **kwargs: str | None) -> None:
+        if not overwrite:
+            already_set = [k for k, v in kwargs.items() if scoped_getenv(k, v) != v]
+            if already_set:
+                msg = "{} variable(s) already set: {}".format(
+                    len(already_set), ", ".join(already_set)
+                )
+                raise ValueError(msg)
+        self._kvs = kwargs
+
+    def __enter__(self) -> "ScopedEnv":
+        overlay = dict(_ENV_OVERLAY.get())
+        overlay.update(self._kvs)
+        token = _ENV_OVERLAY.set(MappingProxyType(overlay))
+        _ENV_TOKENS.set(_ENV_TOKENS.get() + (token,))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        tokens = _ENV_TOKENS.get()
+        _ENV_TOKENS.set(tokens[:-1])
+        _ENV_OVERLAY.reset(tokens[-1])
+
+
+def scoped_getenv(key: str, default: str | None = None) -> str | None:
+    """Get an environment variable, taking ScopedEnv overrides into account.
+
+    Args:
+        key: name of the environment variable
+        default: value to return if the variable isn't set
+
+    Returns:
+        str | None: value of the variable in the current context, or the default
+    """
+    overlay = _ENV_OVERLAY.get()
+    if key in overlay:
+        value = overlay[key]
+        return default if value is None else value
+    return os.environ.get(key, default)
+
+
+def scoped_environ() -> dict[str, str]:
+    """Get the environment as seen in the current context, e.g. for subprocess's env argument.
+
+    Returns:
+        dict[str, str]: os.environ with the current ScopedEnv overrides applied
+    """
+    env = dict(os.environ)
+    for key, value in _ENV_OVERLAY.get().items():
+        if value is None:
+            env.pop(key, None)
+        else:
+            env[key] = value
+    return env
@@ -2,6 +2,12 @@ import functools
 import glob
 import logging
 import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
 from signal import SIGINT, SIGTERM, getsignal, signal
 
@@ -13,7 +19,12 @@ from .files import (
     remove_lock,
     wait_for_lock,
 )
-from .paths import mkabs
+from .paths import expandpath, mkabs
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
 
 PID = os.getpid()
 READ = f"read-{PID}"
@@ -21,11 +32,43 @@ READ_GLOB = "read-*"
 WRITE = "write"
 UNIVERSAL = "universal"
 LOCK_PREFIX = "lock"
+FLOCK_PREFIX = f"{LOCK_PREFIX}-flock-"
+LOCK_BACKENDS_ENV_VAR = "UBIQUERG_LOCK_BACKENDS"
+DEFAULT_LOCK_BACKEND = "three"
+LOCKER_CACHE_SIZE = 128
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class ThreeLocker(object):
+class _TryLockMixin:
+    """Non-blocking lock attempts for lockers accepting a deadline."""
+
+    __slots__ = ()
+
+    def try_read_lock(self) -> bool:
+        """Read-lock the file only if that's possible without waiting.
+
+        Returns:
+            bool: whether the lock was acquired
+        """
+        try:
+            return self.read_lock(deadline=time.monotonic())
+        except RuntimeError:
+            return False
+
+    def try_write_lock(self) -> bool:
+        """Write-lock the file only if that's possible without waiting.
+
+        Returns:
+            bool: whether the lock was acquired
+        """
+        try:
+            return self.write_lock(deadline=time.monotonic())
+        except RuntimeError:
+            return False
+
+
+class ThreeLocker(_TryLockMixin):
     """
     A class to lock files for reading and writing.
 
@@ -42,6 +85,8 @@ class ThreeLocker(object):
         the same file.
     """
 
+    __slots__ = ("wait_max", "strict_ro_locks", "_filepath", "lock_paths", "locked", "__weakref__")
+
     def __init__(self, filepath: str, wait_max: int = 10, strict_ro_locks: bool = False):
         self.wait_max = wait_max
         self.strict_ro_locks = strict_ro_locks
@@ -62,7 +107,21 @@ class ThreeLocker(object):
 
         return self._filepath
 
-    def read_lock(self) -> bool:
+    def read_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        """Read-lock the file.
+
+        Args:
+            deadline: time.monotonic() value at which to give up; overrides wait_max
+            cancel: event that aborts the wait when set, e.g. from another thread
+
+        Returns:
+            bool: whether the file was locked
+
+        Raises:
+            RuntimeError: if the lock can't be acquired in time or the wait is cancelled
+        """
         if not self.filepath:
             _LOGGER.warning("No filepath, no need to lock.")
             return True
@@ -70,11 +129,25 @@ class ThreeLocker(object):
         if not ensure_write_access(lock_path, self.strict_ro_locks):
             return False
 
-        self.create_read_lock(self.filepath, self.wait_max)
+        self.create_read_lock(self.filepath, self.wait_max, deadline, cancel)
         self.locked[READ] = True
         return True
 
-    def write_lock(self) -> bool:
+    def write_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        """Write-lock the file.
+
+        Args:
+            deadline: time.monotonic() value at which to give up; overrides wait_max
+            cancel: event that aborts the wait when set, e.g. from another thread
+
+        Returns:
+            bool: whether the file was locked
+
+        Raises:
+            RuntimeError: if the lock can't be acquired in time or the wait is cancelled
+        """
         if not self.filepath:
             _LOGGER.warning("No filepath, no need to lock.")
             return True
@@ -83,7 +156,7 @@ class ThreeLocker(object):
         if not ensure_write_access(lock_path, self.strict_ro_locks):
             # for writing, just fail anyway
             raise OSError(f"No write access to '{lock_path}'; can't lock file.")
-        self.create_write_lock(self.filepath, self.wait_max)
+        self.create_write_lock(self.filepath, self.wait_max, deadline, cancel)
         self.locked[READ] = True
         self.locked[WRITE] = True
         return True
@@ -108,40 +181,64 @@ class ThreeLocker(object):
         self.locked[READ] = False
         return True
 
-    def create_read_lock(self, filepath: str = None, wait_max: int = None) -> None:
+    def create_read_lock(
+        self,
+        filepath: str = None,
+        wait_max: int = None,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> None:
         """Securely create a read lock file.
 
         Args:
             filepath: path to a file to lock
             wait_max: max wait time if the file in question is already locked
+            deadline: time.monotonic() value at which to give up; overrides wait_max
+            cancel: event that aborts the wait when set
         """
         filepath = self.filepath if filepath is None else filepath
         wait_max = self.wait_max if wait_max is None else wait_max
-        wait_for_lock(self.lock_paths[UNIVERSAL], wait_max)
-        _create_lock(self.lock_paths[UNIVERSAL], filepath, wait_max)
-        wait_for_lock(self.lock_paths[WRITE], wait_max)
-        _create_lock(self.lock_paths[READ], filepath, wait_max)
-        _remove_lock(self.lock_paths[UNIVERSAL])
-
-    def create_write_lock(self, filepath: str = None, wait_max: int = None) -> None:
+        wait_for_lock(self.lock_paths[UNIVERSAL], wait_max, deadline, cancel)
+        _create_lock(self.lock_paths[UNIVERSAL], filepath, wait_max, deadline, cancel)
+        try:
+            wait_for_lock(self.lock_paths[WRITE], wait_max, deadline, cancel)
+            _create_lock(self.lock_paths[READ], filepath, wait_max, deadline, cancel)
+        finally:
+            _remove_lock(self.lock_paths[UNIVERSAL])
+
+    def create_write_lock(
+        self,
+        filepath: str = None,
+        wait_max: int = None,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> None:
         """Securely create a write lock file.
 
         Args:
             filepath: path to a file to lock
             wait_max: max wait time if the file in question is already locked
+            deadline: time.monotonic() value at which to give up; overrides wait_max
+            cancel: event that aborts the wait when set
         """
         filepath = self.filepath if filepath is None else filepath
         wait_max = self.wait_max if wait_max is None else wait_max
-        wait_for_lock(self.lock_paths[UNIVERSAL], wait_max)
-        _create_lock(self.lock_paths[UNIVERSAL], filepath, wait_max)
-        read_lock_paths = glob.glob(
-            self.lock_paths[READ_GLOB]
-        )  # must occur after universal lock is set
-        all_lock_paths = read_lock_paths + [self.lock_paths[WRITE]]
-        wait_for_locks(all_lock_paths, wait_max)
-        _create_lock(self.lock_paths[READ], filepath, wait_max)
-        _create_lock(self.lock_paths[WRITE], filepath, wait_max)
-        _remove_lock(self.lock_paths[UNIVERSAL])
+        wait_for_lock(self.lock_paths[UNIVERSAL], wait_max, deadline, cancel)
+        _create_lock(self.lock_paths[UNIVERSAL], filepath, wait_max, deadline, cancel)
+        try:
+            read_lock_paths = glob.glob(
+                self.lock_paths[READ_GLOB]
+            )  # must occur after universal lock is set
+            all_lock_paths = read_lock_paths + [self.lock_paths[WRITE]]
+            wait_for_locks(all_lock_paths, wait_max, deadline, cancel)
+            _create_lock(self.lock_paths[READ], filepath, wait_max, deadline, cancel)
+            try:
+                _create_lock(self.lock_paths[WRITE], filepath, wait_max, deadline, cancel)
+            except BaseException:
+                _remove_lock(self.lock_paths[READ])
+                raise
+        finally:
+            _remove_lock(self.lock_paths[UNIVERSAL])
 
     def _interrupt_handler(self, signal_received, frame):
         if signal_received in (SIGINT, SIGTERM):
@@ -188,11 +285,18 @@ def ensure_locked(lock_type: str = WRITE):  # decorator factory
 
 
 @contextmanager
-def read_lock(obj: object) -> object:
+def read_lock(
+    obj: object, deadline: float | None = None, cancel: threading.Event | None = None
+) -> object:
     """Read-lock a filepath or object with locker attribute.
 
+    A filepath string is locked with the backend chosen for it by the lock
+    backend policy; see `get_lock_backend`.
+
     Args:
         obj: filepath string or object with locker attribute
+        deadline: time.monotonic() value at which to give up waiting for the lock
+        cancel: event that aborts waiting for the lock when set
 
     Yields:
         object: the locked object
@@ -211,7 +315,7 @@ def read_lock(obj: object) -> object:
                 do_work(cfg)  # Pass already-locked object
     """
     if isinstance(obj, str):
-        locker = ThreeLocker(obj)
+        locker = make_locker(obj)
     elif hasattr(obj, "locker"):
         locker = obj.locker
     else:
@@ -231,26 +335,32 @@ def read_lock(obj: object) -> object:
     except ValueError as e:
         _LOGGER.error(f"Failed to set interrupt handler: {e}")
 
-    locker.read_lock()
+    try:
+        locker.read_lock(**_wait_kwargs(deadline, cancel))
+    except BaseException:
+        _restore_signals(old_sigterm, old_sigint)
+        raise
 
     try:
         yield obj
     finally:
         locker.read_unlock()
-        if old_sigterm is not None:
-            try:
-                signal(SIGTERM, old_sigterm)
-                signal(SIGINT, old_sigint)
-            except ValueError:
-                pass
+        _restore_signals(old_sigterm, old_sigint)
 
 
 @contextmanager
-def write_lock(obj: object) -> object:
+def write_lock(
+    obj: object, deadline: float | None = None, cancel: threading.Event | None = None
+) -> object:
     """Write-lock file path or object with locker attribute.
 
+    A filepath string is locked with the backend chosen for it by the lock
+    backend policy; see `get_lock_backend`.
+
     Args:
         obj: filepath string or object with locker attribute
+        deadline: time.monotonic() value at which to give up waiting for the lock
+        cancel: event that aborts waiting for the lock when set
 
     Yields:
         object: the locked object
@@ -269,7 +379,7 @@ def write_lock(obj: object) -> object:
                 do_work_and_write(cfg)  # Don't re-lock inside
     """
     if isinstance(obj, str):
-        locker = ThreeLocker(obj)
+        locker = make_locker(obj)
     elif hasattr(obj, "locker"):
         locker = obj.locker
     else:
@@ -286,17 +396,119 @@ def write_lock(obj: object) -> object:
     except ValueError as e:
         _LOGGER.error(f"Failed to set interrupt handler: {e}")
 
-    locker.write_lock()
+    try:
+        locker.write_lock(**_wait_kwargs(deadline, cancel))
+    except BaseException:
+        _restore_signals(old_sigterm, old_sigint)
+        raise
+
     try:
         yield obj
     finally:
         locker.write_unlock()
-        if old_sigterm is not None:
+        _restore_signals(old_sigterm, old_sigint)
+
+
+def _wait_kwargs(deadline: float | None, cancel: threading.Event | None) -> dict:
+    # only pass what's set, so lockers without deadline support keep working
+    kwargs = {}
+    if deadline is not None:
+        kwargs["deadline"] = deadline
+    if cancel is not None:
+        kwargs["cancel"] = cancel
+    return kwargs
+
+
+def _restore_signals(old_sigterm, old_sigint) -> None:
+    if old_sigterm is not None:
+        try:
+            signal(SIGTERM, old_sigterm)
+            signal(SIGINT, old_sigint)
+        except ValueError:
+            pass
+
+
+def iter_locked(
+    paths: Iterable[str], mode: str = WRITE, prefetch: int = 1, **kwargs
+) -> Iterator[str]:
+    """Iterate over files, each one locked while the caller works on it.
+
+    Locks for the next `prefetch` files are acquired in a background thread
+    while the caller works on the current one, hiding lock latency behind the
+    caller's work. A file's lock is released when the caller moves on to the
+    next file or stops iterating.
+
+    Args:
+        paths: paths to the files to lock, in processing order
+        mode: READ or WRITE
+        prefetch: number of files to lock ahead of the current one
+        **kwargs: passed to make_locker (e.g. backend, wait_max)
+
+    Returns:
+        Iterator[str]: paths to the files, each one locked while it's current
+
+    Raises:
+        ValueError: if the mode is unknown or prefetch isn't positive
+    """
+    if mode not in (READ, WRITE):
+        raise ValueError(f"Unknown lock mode: '{mode}'. Use READ or WRITE.")
+    if prefetch < 1:
+        raise ValueError(f"prefetch must be at least 1, got {prefetch}")
+    return _iter_locked(paths, mode, prefetch, kwargs)
+
+
+def _iter_locked(paths: Iterable[str], mode: str, prefetch: int, kwargs: dict) -> Iterator[str]:
+    slots = threading.Semaphore(prefetch)
+    ready = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def lock_ahead():
+        try:
+            for path in paths:
+                slots.acquire()
+                if stop.is_set():
+                    return
+                locker = make_locker(path, **kwargs)
+                if mode == WRITE:
+                    locker.write_lock(cancel=stop)
+                else:
+                    locker.read_lock(cancel=stop)
+                ready.put((path, locker))
+        except BaseException as e:
+            ready.put(e)
+        else:
+            ready.put(done)
+
+    def unlock(locker):
+        if mode == WRITE:
+            locker.write_unlock()
+        else:
+            locker.read_unlock()
+
+    worker = threading.Thread(target=lock_ahead, name="ubiquerg-iter-locked", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            path, locker = item
+            slots.release()
             try:
-                signal(SIGTERM, old_sigterm)
-                signal(SIGINT, old_sigint)
-            except ValueError:
-                pass
+                yield path
+            finally:
+                unlock(locker)
+    finally:
+        stop.set()
+        slots.release()
+        worker.join()
+        while not ready.empty():
+            item = ready.get_nowait()
+            if isinstance(item, tuple):
+                unlock(item[1])
 
 
 def locked_read_file(filepath, create_file: bool = False) -> str:
@@ -324,17 +536,57 @@ def locked_read_file(filepath, create_file: bool = False) -> str:
     return file_contents
 
 
-def wait_for_locks(lock_paths: list | str, wait_max: int = 10):
+def wait_for_locks(
+    lock_paths: list | str,
+    wait_max: int = 10,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+    raise_on_timeout: bool = True,
+) -> list[str]:
     """Wait for lock files to be removed.
 
+    All lock files are polled together against one overall deadline, so the
+    wait is bounded by wait_max however many locks there are, and a lock that
+    is released early stops being checked right away.
+
     Args:
-        lock_paths: path to a file to lock
-        wait_max: max wait time if the file in question is already locked
+        lock_paths: path(s) to the lock files to wait upon
+        wait_max: max total wait time if any of the files are locked
+        deadline: time.monotonic() value at which to give up; overrides wait_max
+        cancel: event that aborts the wait when set
+        raise_on_timeout: whether running out of time is an error, rather than
+            returning the lock files that still exist
+
+    Returns:
+        list[str]: lock files still present when the wait ran out; empty if all were removed
+
+    Raises:
+        RuntimeError: if the wait is cancelled, or if lock files remain when it
+            runs out and raise_on_timeout is set
     """
     if not isinstance(lock_paths, list):
         lock_paths = [lock_paths]
-    for lock_path in lock_paths:
-        wait_for_lock(lock_path, wait_max)
+    if deadline is None:
+        deadline = time.monotonic() + wait_max
+    held = [p for p in lock_paths if os.path.isfile(p)]
+    if held:
+        _LOGGER.info(f"Waiting for {len(held)} file lock(s): {[os.path.basename(p) for p in held]}")
+    sleeptime = 0.001
+    while held:
+        if cancel is not None and cancel.is_set():
+            raise RuntimeError(f"Waiting for lock files was cancelled: {held}")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if not raise_on_timeout:
+                return held
+            raise RuntimeError(f"The wait time has run out and lock files still exist: {held}")
+        if cancel is None:
+            time.sleep(min(sleeptime, remaining))
+        else:
+            cancel.wait(min(sleeptime, remaining))
+        sleeptime = min((sleeptime + 0.1) * 1.25, 10)
+        held = [p for p in held if os.path.isfile(p)]
+    return []
 
 
 def ensure_write_access(lock_path: str, strict_ro_locks: bool = False) -> bool:
@@ -370,15 +622,15 @@ def make_all_lock_paths(filepath: str) -> dict[str, str]:
     Create a collection of paths to lock files with given name as base.
     """
     lock_paths = {}
+    base, name = os.path.split(filepath)
     for type in [READ, WRITE, UNIVERSAL, READ_GLOB]:
-        prefix = f"{LOCK_PREFIX}-{type}-" if type else LOCK_PREFIX
-        base, name = os.path.split(filepath)
+        prefix = f"{LOCK_PREFIX}-{type}-"
         lock_name = name if name.startswith(prefix) else prefix + name
         lock_paths[type] = lock_name if not base else os.path.join(base, lock_name)
     return lock_paths
 
 
-class OneLocker:
+class OneLocker(_TryLockMixin):
     """A simple mutual-exclusion file locker.
 
     Uses a single lock file for exclusive access. Unlike ThreeLocker,
@@ -387,6 +639,8 @@ class OneLocker:
     not needed.
     """
 
+    __slots__ = ("wait_max", "strict_ro_locks", "_filepath", "lock_path", "locked", "__weakref__")
+
     def __init__(self, filepath: str, wait_max: int = 10, strict_ro_locks: bool = False):
         self.wait_max = wait_max
         self.strict_ro_locks = strict_ro_locks
@@ -406,11 +660,15 @@ class OneLocker:
             self.lock_path = None
         return self._filepath
 
-    def read_lock(self) -> bool:
-        return self._lock()
+    def read_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        return self._lock(deadline, cancel)
 
-    def write_lock(self) -> bool:
-        return self._lock()
+    def write_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        return self._lock(deadline, cancel)
 
     def read_unlock(self) -> bool:
         return self._unlock()
@@ -418,13 +676,13 @@ class OneLocker:
     def write_unlock(self) -> bool:
         return self._unlock()
 
-    def _lock(self) -> bool:
+    def _lock(self, deadline: float | None = None, cancel: threading.Event | None = None) -> bool:
         if not self.filepath:
             _LOGGER.warning("No filepath, no need to lock.")
             return True
         if not ensure_write_access(self.lock_path, self.strict_ro_locks):
             return False
-        create_lock(self.filepath, self.wait_max)
+        create_lock(self.filepath, self.wait_max, deadline, cancel)
         self.locked[READ] = True
         self.locked[WRITE] = True
         return True
@@ -459,3 +717,342 @@ class OneLocker:
     def __del__(self) -> None:
         if self.filepath and (self.locked[READ] or self.locked[WRITE]):
             self._unlock()
+
+
+class FlockLocker(_TryLockMixin):
+    """A file locker based on flock(2) advisory locks.
+
+    Read locks are shared and write locks are exclusive. The lock is held on a
+    companion lock file that is never removed, so locking costs a single
+    system call and the kernel releases the lock if the process dies. flock
+    is not reliable on many network filesystems (e.g. NFS); use ThreeLocker
+    there.
+
+    A read lock can be upgraded to a write lock. As with flock itself, the
+    upgrade isn't atomic: another writer may get the lock in between.
+    """
+
+    __slots__ = (
+        "wait_max",
+        "strict_ro_locks",
+        "_filepath",
+        "lock_path",
+        "locked",
+        "_fd",
+        "__weakref__",
+    )
+
+    def __init__(self, filepath: str, wait_max: int = 10, strict_ro_locks: bool = False):
+        if fcntl is None:
+            raise OSError("flock-based locking is not available on this platform")
+        self.wait_max = wait_max
+        self.strict_ro_locks = strict_ro_locks
+        self._fd = None
+        self.set_file_path(filepath)
+        self.locked = {READ: False, WRITE: False}
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
+
+    def set_file_path(self, filepath: str) -> str:
+        if filepath:
+            self._filepath = mkabs(filepath)
+            base, name = os.path.split(self._filepath)
+            self.lock_path = os.path.join(base, FLOCK_PREFIX + name)
+        else:
+            self._filepath = None
+            self.lock_path = None
+        return self._filepath
+
+    def read_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        if not self._flock(fcntl.LOCK_SH, deadline, cancel):
+            return False
+        self.locked[READ] = True
+        return True
+
+    def write_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        if not self._flock(fcntl.LOCK_EX, deadline, cancel):
+            return False
+        self.locked[READ] = True
+        self.locked[WRITE] = True
+        return True
+
+    def read_unlock(self) -> bool:
+        if self.locked[WRITE]:
+            raise RuntimeError("Cannot read_unlock while write lock is held; use write_unlock()")
+        return self._unlock()
+
+    def write_unlock(self) -> bool:
+        return self._unlock()
+
+    def _flock(
+        self,
+        operation: int,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> bool:
+        if not self.filepath:
+            _LOGGER.warning("No filepath, no need to lock.")
+            return True
+        upgrade = self._fd is not None
+        if upgrade and (operation != fcntl.LOCK_EX or self.locked[WRITE]):
+            raise RuntimeError(f"Already locked: {self.lock_path}")
+        if not upgrade:
+            if not ensure_write_access(self.lock_path, self.strict_ro_locks):
+                return False
+            self._fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o666)
+        sleeptime = 0.001
+        if deadline is None:
+            deadline = time.monotonic() + self.wait_max
+        while True:
+            try:
+                fcntl.flock(self._fd, operation | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if cancel is not None and cancel.is_set():
+                    self._abandon(upgrade)
+                    raise RuntimeError(f"Waiting for lock was cancelled: {self.lock_path}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._abandon(upgrade)
+                    raise RuntimeError(
+                        f"The wait time has run out and the lock is still held: {self.lock_path}"
+                    )
+                if cancel is None:
+                    time.sleep(min(sleeptime, remaining))
+                else:
+                    cancel.wait(min(sleeptime, remaining))
+                sleeptime = min(sleeptime * 2, 0.5)
+
+    def _abandon(self, upgrade: bool) -> None:
+        """Give up a lock attempt; a failed upgrade keeps the read lock if it can."""
+        if upgrade:
+            # A failed conversion may have dropped the shared lock.
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                pass
+        os.close(self._fd)
+        self._fd = None
+        self.locked[READ] = False
+        self.locked[WRITE] = False
+
+    def _unlock(self) -> bool:
+        if not self.filepath:
+            _LOGGER.warning("No filepath, no need to unlock.")
+            return True
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.locked[READ] = False
+        self.locked[WRITE] = False
+        return True
+
+    def _interrupt_handler(self, signal_received, frame):
+        if signal_received in (SIGINT, SIGTERM):
+            _LOGGER.warning(f"Received {signal_received.name}, unlocking file and exiting...")
+            self._unlock()
+            raise SystemExit
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({{'filepath': {self.filepath!r}, 'wait_max': {self.wait_max}, 'locked': {self.locked}, 'strict_ro_locks': {self.strict_ro_locks}}})"
+
+    def __del__(self) -> None:
+        if getattr(self, "_fd", None) is not None:
+            self._unlock()
+
+
+class NoopLocker(_TryLockMixin):
+    """A locker that only tracks lock state and never touches the filesystem.
+
+    Useful for files on read-only mounts, where no other process can be
+    writing and lock files cannot be created anyway.
+    """
+
+    __slots__ = ("wait_max", "strict_ro_locks", "_filepath", "locked", "__weakref__")
+
+    def __init__(self, filepath: str, wait_max: int = 10, strict_ro_locks: bool = False):
+        self.wait_max = wait_max
+        self.strict_ro_locks = strict_ro_locks
+        self._filepath = mkabs(filepath) if filepath else None
+        self.locked = {READ: False, WRITE: False}
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
+
+    def read_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        self.locked[READ] = True
+        return True
+
+    def write_lock(
+        self, deadline: float | None = None, cancel: threading.Event | None = None
+    ) -> bool:
+        self.locked[READ] = True
+        self.locked[WRITE] = True
+        return True
+
+    def read_unlock(self) -> bool:
+        if self.locked[WRITE]:
+            raise RuntimeError("Cannot read_unlock while write lock is held; use write_unlock()")
+        self.locked[READ] = False
+        return True
+
+    def write_unlock(self) -> bool:
+        self.locked[READ] = False
+        self.locked[WRITE] = False
+        return True
+
+    def _interrupt_handler(self, signal_received, frame):
+        if signal_received in (SIGINT, SIGTERM):
+            raise SystemExit
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({{'filepath': {self.filepath!r}, 'locked': {self.locked}}})"
+
+
+_LOCK_BACKENDS = {
+    "three": ThreeLocker,
+    "one": OneLocker,
+    "flock": FlockLocker,
+    "noop": NoopLocker,
+}
+_LOCK_POLICY: dict[str, str] = {}
+# Lockers made for paths, reused while unlocked; the deque keeps the most
+# recently used ones alive so loops over a working set of files hit the cache.
+_LOCKER_CACHE: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_RECENT_LOCKERS: deque = deque(maxlen=LOCKER_CACHE_SIZE)
+
+
+def register_lock_backend(name: str, locker_class: type) -> None:
+    """Register a locker class under a backend name.
+
+    The class must accept a filepath as its first constructor argument (plus
+    optional wait_max and strict_ro_locks keyword arguments) and provide the
+    same locking methods as ThreeLocker.
+
+    Args:
+        name: name to refer to the backend by in the lock backend policy
+        locker_class: locker class implementing the backend
+    """
+    _LOCK_BACKENDS[name] = locker_class
+
+
+def set_lock_backend(prefix: str, backend: str | None) -> None:
+    """Use a lock backend for every file under a path prefix.
+
+    Prefixes are matched by path component, and the longest matching prefix
+    wins. Settings made here take precedence over the ones from the
+    UBIQUERG_LOCK_BACKENDS environment variable.
+
+    Args:
+        prefix: directory under which the backend should be used
+        backend: name of a registered backend, or None to remove the setting
+    """
+    prefix = _normalize_prefix(prefix)
+    if backend is None:
+        _LOCK_POLICY.pop(prefix, None)
+        return
+    if backend not in _LOCK_BACKENDS:
+        raise ValueError(f"Unknown lock backend: '{backend}'. Known: {list(_LOCK_BACKENDS)}")
+    _LOCK_POLICY[prefix] = backend
+
+
+def get_lock_backend(filepath: str | None) -> str:
+    """Determine the name of the lock backend to use for a file.
+
+    The UBIQUERG_LOCK_BACKENDS environment variable holds entries separated
+    by os.pathsep, each either 'prefix=backend' or a bare backend name that
+    sets the default, e.g. 'flock:/mnt/nfs=three:/mnt/ref=noop'.
+
+    Args:
+        filepath: path to the file to lock
+
+    Returns:
+        str: name of the lock backend for the file
+    """
+    return _backend_for(_locker_path(filepath) if filepath else None)
+
+
+def make_locker(filepath: str, backend: str | None = None, **kwargs):
+    """Get a locker for a file using the backend chosen for its path.
+
+    Lockers are cached by thread, backend, absolute path and settings, so
+    repeated locking of the same files doesn't pay for path resolution and
+    locker setup each time. A cached locker is only handed out to the thread
+    it was made for, and only while it isn't holding a lock, so concurrent
+    threads never share a locker.
+
+    Args:
+        filepath: path to the file to lock
+        backend: name of the backend to use instead of the policy's choice
+        **kwargs: passed to the locker class (e.g. wait_max, strict_ro_locks)
+
+    Returns:
+        locker for the file
+    """
+    path = _locker_path(filepath) if filepath else None
+    backend = backend or _backend_for(path)
+    try:
+        locker_class = _LOCK_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown lock backend: '{backend}'. Known: {list(_LOCK_BACKENDS)}")
+    if not path:
+        return locker_class(filepath, **kwargs)
+    key = (threading.get_ident(), locker_class, path, tuple(sorted(kwargs.items())))
+    locker = _LOCKER_CACHE.get(key)
+    if locker is None or any(locker.locked.values()):
+        locker = locker_class(path, **kwargs)
+        _LOCKER_CACHE[key] = locker
+    _RECENT_LOCKERS.append(locker)
+    return locker
+
+
+def _locker_path(filepath: str) -> str:
+    if os.path.isabs(filepath) and "$" not in filepath:
+        return filepath
+    return mkabs(filepath)
+
+
+def _backend_for(path: str | None) -> str:
+    env_default, env_policy = _parse_lock_backends_env(os.environ.get(LOCK_BACKENDS_ENV_VAR, ""))
+    default = env_default or DEFAULT_LOCK_BACKEND
+    if not path or not (env_policy or _LOCK_POLICY):
+        return default
+    policy = {**env_policy, **_LOCK_POLICY}
+    while True:
+        if path in policy:
+            return policy[path]
+        parent = os.path.dirname(path)
+        if parent == path:
+            return default
+        path = parent
+
+
+def _normalize_prefix(prefix: str) -> str:
+    return os.path.abspath(expandpath(prefix))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_lock_backends_env(value: str) -> tuple[str | None, dict[str, str]]:
+    default = None
+    policy = {}
+    for entry in value.split(os.pathsep):
+        entry = entry.strip()
+        if not entry:
+            continue
+        prefix, sep, backend = entry.rpartition("=")
+        if not sep:
+            default = backend
+        else:
+            policy[_normalize_prefix(prefix)] = backend
+    return default, policy
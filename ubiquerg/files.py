@@ -4,11 +4,14 @@ import errno
 import logging
 import os
 import sys
+import threading
 import time
 from hashlib import md5
 from tarfile import open as topen
 from warnings import warn
 
+from .web import _SCHEME_HANDLERS, _file_uri_to_path, _uri_scheme
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -30,13 +33,28 @@ LOCK_PREFIX = "lock."
 def checksum(path: str, blocksize: int = int(2e9)) -> str:
     """Generate a md5 checksum for the file contents in the provided path.
 
+    Paths with a URI scheme other than file:// are checksummed by the handler
+    registered for the scheme; see register_scheme_handler.
+
     Args:
         path: path to file for which to generate checksum
         blocksize: number of bytes to read per iteration, default: 2GB
 
     Returns:
         str: checksum hash
+
+    Raises:
+        ValueError: if the path has a scheme with no handler that can checksum it,
+            or is a file:// URI on a host other than localhost
     """
+    scheme = _uri_scheme(path)
+    if scheme == "file":
+        path = _file_uri_to_path(path)
+    elif scheme is not None:
+        handler = _SCHEME_HANDLERS.get(scheme)
+        if handler is None or not hasattr(handler, "checksum"):
+            raise ValueError(f"No handler registered to checksum '{scheme}' paths: {path}")
+        return handler.checksum(path, blocksize)
     m = md5(usedforsecurity=False)
     with open(path, "rb") as f:
         while True:
@@ -50,19 +68,36 @@ def checksum(path: str, blocksize: int = int(2e9)) -> str:
 def size(path: str | list[str], size_str: bool = True) -> int | str | None:
     """Get the size of a file or directory or list of them in the provided path.
 
+    Paths with a URI scheme other than file:// are sized by the handler
+    registered for the scheme; see register_scheme_handler.
+
     Args:
         path: path or list of paths to the file or directories to check size of
         size_str: whether the size should be converted to a human-readable string, e.g. convert B to MB
 
     Returns:
         int | str: file size or file size string
+
+    Raises:
+        ValueError: if the path is a file:// URI on a host other than localhost
     """
 
     if isinstance(path, list):
         s_list = sum(filter(None, [size(x, size_str=False) for x in path]))
         return filesize_to_str(s_list) if size_str else s_list
 
-    if os.path.isfile(path):
+    scheme = _uri_scheme(path)
+    if scheme == "file":
+        path = _file_uri_to_path(path)
+        scheme = None
+    if scheme is not None:
+        handler = _SCHEME_HANDLERS.get(scheme)
+        if handler is not None and hasattr(handler, "size"):
+            s = handler.size(path)
+        else:
+            warn("size could not be determined for: {}".format(path))
+            s = None
+    elif os.path.isfile(path):
         s = os.path.getsize(path)
     elif os.path.isdir(path):
         s = 0
@@ -159,12 +194,26 @@ def _get_file_mod_time(pth: str) -> float:
         return time.time()
 
 
-def wait_for_lock(lock_file: str, wait_max: int = 30) -> None:
+def wait_for_lock(
+    lock_file: str,
+    wait_max: int = 30,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+) -> None:
     """Just sleep until the lock_file does not exist.
 
+    Without a deadline, the wait time restarts whenever the lock file is
+    refreshed (its modification time changes).
+
     Args:
         lock_file: Lock file to wait upon
         wait_max: max wait time if the file in question is already locked
+        deadline: time.monotonic() value at which to stop waiting; overrides wait_max.
+            A deadline in the past checks the lock once without waiting
+        cancel: event that stops the wait when set, e.g. from another thread
+
+    Raises:
+        RuntimeError: if the lock file still exists when the wait runs out or is cancelled
     """
     sleeptime = 0.001
     first_message_flag = False
@@ -174,6 +223,14 @@ def wait_for_lock(lock_file: str, wait_max: int = 30) -> None:
     if os.path.isfile(lock_file):
         ori_timestamp = _get_file_mod_time(lock_file)
     while os.path.isfile(lock_file):
+        if cancel is not None and cancel.is_set():
+            raise RuntimeError(f"Waiting for lock file was cancelled: {lock_file}")
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(
+                    f"The deadline has been reached and the lock file still exists: {lock_file}"
+                )
         if first_message_flag is False:
             _LOGGER.info(f"Waiting for file lock: {os.path.basename(lock_file)}")
             # sys.stdout.write("Waiting for file lock: {} ".format(os.path.basename(lock_file)))
@@ -184,10 +241,14 @@ def wait_for_lock(lock_file: str, wait_max: int = 30) -> None:
             if dot_count % 60 == 0:
                 sys.stderr.write("")
         sys.stderr.flush()
-        time.sleep(sleeptime)
+        nap = sleeptime if deadline is None else min(sleeptime, remaining)
+        if cancel is None:
+            time.sleep(nap)
+        else:
+            cancel.wait(nap)
         totaltime += sleeptime
         sleeptime = min((sleeptime + 0.1) * 1.25, 10)
-        if totaltime >= wait_max:
+        if deadline is None and totaltime >= wait_max:
             if os.path.isfile(lock_file):
                 timestamp = _get_file_mod_time(lock_file)
                 if ori_timestamp and timestamp > ori_timestamp:
@@ -261,7 +322,13 @@ def remove_lock(filepath: str) -> bool:
         return False
 
 
-def _create_lock(lock_path: str, filepath: str, wait_max: int) -> None:
+def _create_lock(
+    lock_path: str,
+    filepath: str,
+    wait_max: int,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+) -> None:
     max_retries = 5
     for attempt in range(max_retries):
         try:
@@ -276,20 +343,27 @@ def _create_lock(lock_path: str, filepath: str, wait_max: int) -> None:
                     "The lock has been created in the split second since the "
                     "last lock existence check. Waiting"
                 )
-                wait_for_lock(lock_path, wait_max)
+                wait_for_lock(lock_path, wait_max, deadline, cancel)
             else:
                 raise
     raise OSError(f"Failed to create lock file after {max_retries} attempts: {lock_path}")
 
 
-def create_lock(filepath: str, wait_max: int = 10) -> None:
+def create_lock(
+    filepath: str,
+    wait_max: int = 10,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+) -> None:
     """Securely create a lock file.
 
     Args:
         filepath: path to a file to lock
         wait_max: max wait time if the file in question is already locked
+        deadline: time.monotonic() value at which to give up; overrides wait_max
+        cancel: event that aborts the wait when set
     """
     lock_path = make_lock_path(filepath)
     # wait until no lock is present
-    wait_for_lock(lock_path, wait_max)
-    _create_lock(lock_path, filepath, wait_max)
+    wait_for_lock(lock_path, wait_max, deadline, cancel)
+    _create_lock(lock_path, filepath, wait_max, deadline, cancel)
@@ -1,10 +1,14 @@
 """Filesystem utility functions"""
 
+import bisect
+import fnmatch
+import functools
 import os
 import re
+from collections.abc import Iterable, Iterator
 from typing import Any
 
-from .web import is_url
+from .web import _file_uri_to_path, _resolve_uri, _uri_scheme, is_url
 
 __author__ = "Vince Reuter"
 __email__ = "vreuter@virginia.edu"
@@ -22,6 +26,35 @@ def expandpath(path: str) -> str:
     return os.path.expandvars(os.path.expanduser(path))
 
 
+REGISTRY_PATH_KEYS = ("protocol", "namespace", "item", "subitem", "tag")
+REGISTRY_PATH_CACHE_SIZE = 4096
+
+# This commented regex is the same without protocol
+# ^(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?::([0-9a-zA-Z_.-]+))?$
+# regex = "^(?:([0-9a-zA-Z_-]+)(?:::|:\/\/))?(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?::([0-9a-zA-Z_.-]+))?$"
+_REGISTRY_PATH_REGEX = re.compile(
+    r"^(?:([0-9a-zA-Z._-]+)(?:::|:\/\/))?(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?:\.([0-9a-zA-Z_-]+))?(?::([0-9a-zA-Z_.,|+()-]+))?$"
+)
+# This regex matches strings like:
+# protocol://namespace/item:tag
+# or: protocol::namespace/item:tag
+# The names 'protocol', 'namespace', 'item', and 'tag' are generic and
+# you can use this function for whatever you like in this format... The
+# regex can handle any of these missing and will parse correctly into the
+# same element
+# For instance, you can leave the tag or protocol or both off:
+# ucsc://hg38/bowtie2_index
+# hg38/bowtie2_index
+# With no delimiters, it will match the item name:
+# bowtie2_index
+
+
+@functools.lru_cache(maxsize=REGISTRY_PATH_CACHE_SIZE)
+def _registry_path_groups(rpstring: str) -> tuple[str | None, ...] | None:
+    res = _REGISTRY_PATH_REGEX.match(rpstring)
+    return res.groups() if res else None
+
+
 def parse_registry_path(
     rpstring: str,
     defaults: list[tuple[str, Any]] | None = None,
@@ -32,7 +65,7 @@ def parse_registry_path(
     identifier for a particular asset, like
     protocol::namespace/item.subitem:tag. You can use the `defaults` argument to
     change the names of the entries in the return dict, and to provide defaults
-    in case of missing values.
+    in case of missing values. Results for recently parsed strings are cached.
 
     Args:
         rpstring: string to parse
@@ -41,49 +74,83 @@ def parse_registry_path(
     Returns:
         dict | None: dict with one element for each parsed entry in the path
     """
-
-    if defaults is None:
-        defaults = [
-            ("protocol", None),
-            ("namespace", None),
-            ("item", None),
-            ("subitem", None),
-            ("tag", None),
-        ]
-
-    # This commented regex is the same without protocol
-    # ^(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?::([0-9a-zA-Z_.-]+))?$
-    # regex = "^(?:([0-9a-zA-Z_-]+)(?:::|:\/\/))?(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?::([0-9a-zA-Z_.-]+))?$"
-    regex = r"^(?:([0-9a-zA-Z._-]+)(?:::|:\/\/))?(?:([0-9a-zA-Z_-]+)\/)?([0-9a-zA-Z_-]+)(?:\.([0-9a-zA-Z_-]+))?(?::([0-9a-zA-Z_.,|+()-]+))?$"
-    # This regex matches strings like:
-    # protocol://namespace/item:tag
-    # or: protocol::namespace/item:tag
-    # The names 'protocol', 'namespace', 'item', and 'tag' are generic and
-    # you can use this function for whatever you like in this format... The
-    # regex can handle any of these missing and will parse correctly into the
-    # same element
-    # For instance, you can leave the tag or protocol or both off:
-    # ucsc://hg38/bowtie2_index
-    # hg38/bowtie2_index
-    # With no delimiters, it will match the item name:
-    # bowtie2_index
-
-    res = re.match(regex, rpstring)
-    if not res:
+    captures = _registry_path_groups(rpstring)
+    if captures is None:
         return None
-    # position 0: parent namespace
-    # position 1: namespace
-    # position 2: primary name
-    # position 3: tag
-    captures = res.groups()
-    parsed_identifier = {
-        defaults[0][0]: captures[0] or defaults[0][1],
-        defaults[1][0]: captures[1] or defaults[1][1],
-        defaults[2][0]: captures[2] or defaults[2][1],
-        defaults[3][0]: captures[3] or defaults[3][1],
-        defaults[4][0]: captures[4] or defaults[4][1],
-    }
-    return parsed_identifier
+    if defaults is None:
+        return dict(zip(REGISTRY_PATH_KEYS, captures))
+    return {name: capture or default for (name, default), capture in zip(defaults, captures)}
+
+
+def parse_registry_paths(
+    rpstrings: Iterable[str],
+) -> list[tuple[str | None, str | None, str | None, str | None, str | None] | None]:
+    """Parse many 'registry path' strings into component tuples.
+
+    A bulk counterpart of parse_registry_path for indexing large catalogs: it
+    skips building a dict per path and returns plain tuples instead.
+
+    Args:
+        rpstrings: strings to parse
+
+    Returns:
+        list[tuple | None]: for each string, a (protocol, namespace, item, subitem, tag)
+            tuple with None for missing components, or None if the string isn't a registry path
+    """
+    match = _REGISTRY_PATH_REGEX.match
+    return [res.groups() if (res := match(rp)) else None for rp in rpstrings]
+
+
+def parse_registry_path_columns(
+    rpstrings: Iterable[str],
+    require_protocol: bool = False,
+    require_namespace: bool = False,
+    require_item: bool = True,
+    require_subitem: bool = False,
+    require_tag: bool = False,
+) -> dict[str, list]:
+    """Parse many 'registry path' strings into one column per component.
+
+    Accepts any iterable of strings, including NumPy and pyarrow string arrays;
+    missing values in the input (e.g. None) are treated as invalid paths. The
+    requirement flags mean the same as in parse_registry_path_strict, but only
+    affect the 'valid' column: a string that parses but misses a required
+    component keeps its components.
+
+    Args:
+        rpstrings: strings to parse
+        require_protocol: If True, protocol component must be present
+        require_namespace: If True, namespace component must be present
+        require_item: If True, item component must be present (default: True)
+        require_subitem: If True, subitem component must be present
+        require_tag: If True, tag component must be present
+
+    Returns:
+        dict[str, list]: equal-length lists keyed by component name (protocol,
+            namespace, item, subitem, tag; None where absent or where the string
+            didn't parse), plus 'valid', telling whether each string parsed and
+            met the requirements
+    """
+    if hasattr(rpstrings, "to_pylist"):  # pyarrow array
+        rpstrings = rpstrings.to_pylist()
+    elif hasattr(rpstrings, "tolist"):  # NumPy array
+        rpstrings = rpstrings.tolist()
+    match = _REGISTRY_PATH_REGEX.match
+    parsed = [
+        res.groups() if isinstance(rp, str) and (res := match(rp)) else None for rp in rpstrings
+    ]
+    missing = (None,) * len(REGISTRY_PATH_KEYS)
+    if parsed:
+        columns = dict(zip(REGISTRY_PATH_KEYS, map(list, zip(*(p or missing for p in parsed)))))
+    else:
+        columns = {key: [] for key in REGISTRY_PATH_KEYS}
+    valid = [p is not None for p in parsed]
+    requirements = (require_protocol, require_namespace, require_item, require_subitem, require_tag)
+    for key, required in zip(REGISTRY_PATH_KEYS, requirements):
+        if required:
+            valid = [ok and bool(value) for ok, value in zip(valid, columns[key])]
+    columns["valid"] = valid
+    return columns
 
 
 def parse_registry_path_strict(
@@ -147,11 +214,149 @@ def parse_registry_path_strict(
     return parsed
 
 
+_REGISTRY_QUERY_REGEX = re.compile(
+    _REGISTRY_PATH_REGEX.pattern.replace("[0-9a-zA-Z", "[*?0-9a-zA-Z")
+)
+
+
+class RegistryIndex:
+    """An index of registry paths supporting exact, prefix and wildcard lookups.
+
+    Every component (protocol, namespace, item, subitem, tag) is indexed by
+    value, so a lookup only touches the paths matching its most selective
+    component instead of scanning the whole catalog. Paths can be added and
+    removed at any time.
+
+    A query is a registry path whose components may contain shell-style
+    wildcards: '*' alone matches any value, 'abc*' is a prefix lookup, and
+    other patterns (e.g. 'hg?8') are matched against the distinct values of
+    that component. Components left out of the query match anything, so
+    'hg38/*:default' finds every item in namespace hg38 tagged default, and
+    '*/bowtie2_index' finds bowtie2_index in every namespace.
+    """
+
+    def __init__(self, rpstrings: Iterable[str] = ()) -> None:
+        self._entries: dict[str, tuple] = {}
+        self._postings: dict[str, dict[str | None, set[str]]] = {k: {} for k in REGISTRY_PATH_KEYS}
+        # sorted distinct values per component, rebuilt lazily after changes
+        self._sorted: dict[str, list[str] | None] = {k: [] for k in REGISTRY_PATH_KEYS}
+        for rpstring in rpstrings:
+            self.add(rpstring)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, rpstring: object) -> bool:
+        return rpstring in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} registry paths)"
+
+    def add(self, rpstring: str) -> None:
+        """Add a registry path to the index.
+
+        Args:
+            rpstring: registry path to add
+
+        Raises:
+            ValueError: if the string isn't a valid registry path
+        """
+        if rpstring in self._entries:
+            return
+        res = _REGISTRY_PATH_REGEX.match(rpstring)
+        if not res:
+            raise ValueError(f"Not a registry path: '{rpstring}'")
+        parsed = res.groups()
+        self._entries[rpstring] = parsed
+        for key, value in zip(REGISTRY_PATH_KEYS, parsed):
+            postings = self._postings[key]
+            if value not in postings:
+                postings[value] = set()
+                if value is not None:
+                    self._sorted[key] = None
+            postings[value].add(rpstring)
+
+    def remove(self, rpstring: str) -> None:
+        """Remove a registry path from the index.
+
+        Args:
+            rpstring: registry path to remove
+
+        Raises:
+            KeyError: if the registry path isn't in the index
+        """
+        parsed = self._entries.pop(rpstring)
+        for key, value in zip(REGISTRY_PATH_KEYS, parsed):
+            postings = self._postings[key]
+            postings[value].discard(rpstring)
+            if not postings[value]:
+                del postings[value]
+                if value is not None:
+                    self._sorted[key] = None
+
+    def find(self, query: str) -> list[str]:
+        """Find the registry paths matching a query.
+
+        Args:
+            query: registry path, possibly with wildcards in its components
+
+        Returns:
+            list[str]: sorted matching registry paths
+
+        Raises:
+            ValueError: if the query isn't a valid registry path pattern
+        """
+        res = _REGISTRY_QUERY_REGEX.match(query)
+        if not res:
+            raise ValueError(f"Not a registry path query: '{query}'")
+        matches = []
+        for key, pattern in zip(REGISTRY_PATH_KEYS, res.groups()):
+            if pattern is None or pattern == "*":
+                continue
+            matches.append(self._find_component(key, pattern))
+        if not matches:
+            return sorted(self._entries)
+        matches.sort(key=len)
+        return sorted(matches[0].intersection(*matches[1:]))
+
+    def _find_component(self, key: str, pattern: str) -> set[str]:
+        postings = self._postings[key]
+        if "*" not in pattern and "?" not in pattern:
+            return postings.get(pattern, set())
+        values = self._sorted_values(key)
+        prefix = pattern[:-1]
+        if pattern.endswith("*") and "*" not in prefix and "?" not in prefix:
+            start = bisect.bisect_left(values, prefix)
+            end = bisect.bisect_left(values, prefix + "\U0010ffff", start)
+            matched = values[start:end]
+        else:
+            matched = fnmatch.filter(values, pattern)
+        return set().union(*(postings[v] for v in matched))
+
+    def _sorted_values(self, key: str) -> list[str]:
+        values = self._sorted[key]
+        if values is None:
+            values = sorted(v for v in self._postings[key] if v is not None)
+            self._sorted[key] = values
+        return values
+
+
+MKABS_CACHE_SIZE = 65536
+# what os.path.expandvars substitutes: $name or ${name}
+_ENV_VAR_REGEX = re.compile(r"\$\{?(\w+)\}?")
+
+
 def mkabs(path: str | None, reldir: str | None = None) -> str | None:
     """Make sure a path is absolute.
 
     If not already absolute, it's made absolute relative to a given directory (or file).
-    Also expands ~ and environment variables for kicks.
+    Also expands ~ and environment variables for kicks. URLs are returned as
+    they are, file:// URIs become local paths, and URIs with other schemes
+    (e.g. s3://) go to the handler registered for the scheme, if any, and are
+    otherwise returned unchanged.
 
     Args:
         path: Path to make absolute
@@ -159,24 +364,80 @@ def mkabs(path: str | None, reldir: str | None = None) -> str | None:
 
     Returns:
         str: Absolute path
-    """
-
-    def xpand(path):
-        return os.path.expandvars(os.path.expanduser(path))
 
+    Raises:
+        ValueError: if the path is a file:// URI on a host other than localhost
+    """
     if path is None:
         return path
 
     if is_url(path):
         return path
 
-    if os.path.isabs(xpand(path)):
-        return xpand(path)
+    scheme = _uri_scheme(path)
+    if scheme == "file":
+        path = _file_uri_to_path(path)
+    elif scheme is not None:
+        return _resolve_uri(path, scheme)
+
+    xpath = expandpath(path)
+    if os.path.isabs(xpath):
+        return xpath
 
     if not reldir:
-        return os.path.abspath(xpand(path))
+        return os.path.abspath(xpath)
 
-    if os.path.isdir(reldir):
-        return os.path.join(xpand(reldir), xpand(path))
-    else:
-        return os.path.join(xpand(os.path.dirname(reldir)), xpand(path))
+    return os.path.join(_reldir_base(reldir), xpath)
+
+
+def mkabs_many(paths: Iterable[str | None], reldir: str | None = None) -> list[str | None]:
+    """Make many paths absolute, with the same result as calling mkabs on each.
+
+    The relative directory is checked and expanded only once. Each resolution
+    is cached, keyed on the path, the relative directory, the working
+    directory, and the values of HOME and any environment variables the path
+    refers to, so repeated paths are cheap and changes to the environment
+    still take effect.
+
+    Args:
+        paths: Paths to make absolute
+        reldir: Relative directory to make paths absolute from if they're not already absolute
+
+    Returns:
+        list[str | None]: Absolute paths, in input order
+    """
+    base = _reldir_base(reldir) if reldir else None
+    cwd = os.getcwd()
+    environ = os.environ
+    resolved = []
+    for path in paths:
+        if path is None:
+            resolved.append(None)
+            continue
+        if "://" in path:  # URIs depend on registered handlers; not cached
+            resolved.append(mkabs(path, reldir))
+            continue
+        env = ()
+        if "$" in path:
+            env = tuple((name, environ.get(name)) for name in _ENV_VAR_REGEX.findall(path))
+        if path.startswith("~"):
+            env += (("HOME", environ.get("HOME")),)
+        resolved.append(_mkabs_cached(path, base, cwd, env))
+    return resolved
+
+
+def _reldir_base(reldir: str) -> str:
+    return expandpath(reldir if os.path.isdir(reldir) else os.path.dirname(reldir))
+
+
+@functools.lru_cache(maxsize=MKABS_CACHE_SIZE)
+def _mkabs_cached(
+    path: str, base: str | None, cwd: str, env: tuple[tuple[str, str | None], ...]
+) -> str:
+    # cwd and env are only part of the cache key; they are the current values
+    xpath = expandpath(path)
+    if os.path.isabs(xpath):
+        return xpath
+    if base is None:
+        return os.path.abspath(xpath)
+    return os.path.join(base, xpath)
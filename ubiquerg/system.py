@@ -3,11 +3,23 @@
 import os
 import shutil
 import subprocess
+import time
+from collections.abc import Iterable
+from functools import lru_cache
 
 __author__ = "Databio Lab"
 __email__ = "nathan@code.databio.org"
 
-__all__ = ["is_command_callable", "is_writable"]
+__all__ = ["is_command_callable", "is_writable", "which_many", "check_writable_many"]
+
+WHICH_CACHE_SIZE = 4096
+WRITABLE_CACHE_TTL = 5.0
+WRITABLE_CACHE_SIZE = 65536
+
+# Absolute folder -> (monotonic time of probe, writable, or None if it didn't exist).
+# Relative folders are joined to the working directory but not normalized, so
+# that e.g. 'a/../b' still requires 'a' to exist, as it does for os.path.exists.
+_WRITABLE_PROBES: dict[str, tuple[float, bool | None]] = {}
 
 
 def is_command_callable(cmd: str) -> bool:
@@ -42,9 +54,79 @@ def is_command_callable(cmd: str) -> bool:
         except subprocess.CalledProcessError:
             return False
     else:
+        # Not via which_many's cache: listing all of PATH costs more than one lookup.
         return shutil.which(cmd) is not None
 
 
+def which_many(cmds: Iterable[str], refresh: bool = False) -> dict[str, str | None]:
+    """Find the paths of many commands, like shutil.which, scanning PATH once.
+
+    Each PATH directory is listed once (per value of PATH), and results are
+    cached, so repeated lookups don't touch the filesystem. Commands
+    installed or removed after a lookup won't be noticed unless refresh is
+    set. Commands containing a directory are checked directly, uncached.
+
+    Args:
+        cmds: names of (or paths to) the commands to find
+        refresh: discard cached directory listings and lookups first
+
+    Returns:
+        dict[str, str | None]: path of each command, or None if it isn't found
+
+    Raises:
+        TypeError: if an alleged command isn't a string
+    """
+    cmds = list(cmds)
+    for cmd in cmds:
+        if not isinstance(cmd, str):
+            raise TypeError("Alleged command isn't a string: {} ({})".format(cmd, type(cmd)))
+    if refresh:
+        _which_in_path.cache_clear()
+        _path_listings.cache_clear()
+    if os.name == "nt":
+        return {cmd: shutil.which(cmd) for cmd in cmds}
+    path_var = os.environ.get("PATH", os.defpath)
+    return {cmd: _which(cmd, path_var) for cmd in cmds}
+
+
+def _is_executable_file(path: str) -> bool:
+    return os.path.exists(path) and os.access(path, os.X_OK) and not os.path.isdir(path)
+
+
+@lru_cache(maxsize=WHICH_CACHE_SIZE)
+def _which_in_path(cmd: str, path_var: str) -> str | None:
+    for directory, names in _path_listings(path_var):
+        if cmd in names:
+            candidate = os.path.join(directory, cmd)
+            if _is_executable_file(candidate):
+                return candidate
+    return None
+
+
+def _which(cmd: str, path_var: str) -> str | None:
+    """shutil.which for POSIX, over cached PATH directory listings."""
+    if os.path.dirname(cmd):
+        return cmd if _is_executable_file(cmd) else None
+    return _which_in_path(cmd, path_var)
+
+
+@lru_cache(maxsize=8)
+def _path_listings(path_var: str) -> tuple[tuple[str, frozenset[str]], ...]:
+    """Names in each distinct, existing PATH directory, in PATH order."""
+    listings = []
+    seen = set()
+    for directory in path_var.split(os.pathsep):
+        if not directory or directory in seen:
+            continue
+        seen.add(directory)
+        try:
+            with os.scandir(directory) as entries:
+                listings.append((directory, frozenset(entry.name for entry in entries)))
+        except OSError:
+            continue
+    return tuple(listings)
+
+
 def is_writable(folder: str | None, check_exist: bool = False, create: bool = False) -> bool:
     """Make sure a folder is writable.
 
@@ -71,3 +153,85 @@ def is_writable(folder: str | None, check_exist: bool = False, create: bool = Fa
         if not parent or parent == folder:
             return False
         return is_writable(parent, check_exist)
+
+
+def check_writable_many(
+    folders: Iterable[str | None],
+    check_exist: bool = False,
+    create: bool = False,
+    ttl: float = WRITABLE_CACHE_TTL,
+) -> dict[str | None, bool]:
+    """Check that many folders are writable, as is_writable does for each.
+
+    Each folder, and each parent folder visited for those that don't exist,
+    is probed at most once, and probe results are reused by later calls for
+    `ttl` seconds, so folders sharing parents are cheap to check in bulk.
+
+    Args:
+        folders: Folders to check for writeability
+        check_exist: Throw an error if one doesn't exist?
+        create: Create folders that don't exist?
+        ttl: seconds for which a probe result stays valid; 0 to always probe afresh
+
+    Returns:
+        dict[str | None, bool]: whether each folder is (or could be created) writable
+
+    Raises:
+        OSError: if check_exist is set and a folder doesn't exist
+    """
+    now = time.monotonic()
+    if len(_WRITABLE_PROBES) > WRITABLE_CACHE_SIZE:
+        for folder, (probed, _) in list(_WRITABLE_PROBES.items()):
+            if now - probed >= ttl:
+                del _WRITABLE_PROBES[folder]
+    cwd = os.getcwd()
+    results = {}
+    for requested in folders:
+        folder = requested or "."
+        writable = _probe_writable(folder, cwd, now, ttl)
+        if writable is None:
+            if create:
+                os.makedirs(folder, exist_ok=True)
+                _forget_probes(os.path.join(cwd, folder))
+                writable = True
+            elif check_exist:
+                raise OSError("Folder not found: {}".format(folder))
+            else:
+                writable = _first_extant_parent_writable(folder, cwd, now, ttl)
+        results[requested] = writable
+    return results
+
+
+def _first_extant_parent_writable(folder: str, cwd: str, now: float, ttl: float) -> bool:
+    while True:
+        parent = os.path.dirname(folder)
+        if not parent or parent == folder:
+            return False
+        writable = _probe_writable(parent, cwd, now, ttl)
+        if writable is not None:
+            return writable
+        folder = parent
+
+
+def _forget_probes(folder: str) -> None:
+    """Drop cached probes of an absolute folder and its parents, e.g. after creating them."""
+    while folder in _WRITABLE_PROBES:
+        del _WRITABLE_PROBES[folder]
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+
+
+def _probe_writable(folder: str, cwd: str, now: float, ttl: float) -> bool | None:
+    """Whether a folder is writable, or None if it doesn't exist; cached for ttl seconds."""
+    key = os.path.join(cwd, folder)
+    cached = _WRITABLE_PROBES.get(key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    if os.path.exists(key):
+        writable = os.access(key, os.W_OK) and os.access(key, os.X_OK)
+    else:
+        writable = None
+    _WRITABLE_PROBES[key] = (now, writable)
+    return writable
@@ -1,12 +1,35 @@
 """Time-parsing utilities."""
 
 import datetime
+import re
+from array import array
+from collections.abc import Iterable
+
+__all__ = ["parse_timedelta", "parse_timedeltas"]
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+# ISO-8601 durations without years or months, whose length varies: 'P1DT2H30M', 'PT45.5S'
+_ISO_REGEX = re.compile(
+    rf"\s*([+-]?)P(?!T?\s*$)(?:{_NUMBER}W)?(?:{_NUMBER}D)?"
+    rf"(?:T(?=\d)(?:{_NUMBER}H)?(?:{_NUMBER}M)?(?:{_NUMBER}S)?)?\s*",
+    re.IGNORECASE,
+)
+_ISO_CALENDAR_REGEX = re.compile(r"\s*[+-]?P[^T]*[YM]", re.IGNORECASE)
+# Compact unit forms: '1h30m', '2d 3h', '45s', '1.5h'
+_UNIT_NUMBER = r"(\d+(?:\.\d+)?)"
+_COMPACT_REGEX = re.compile(
+    rf"\s*([+-]?)(?=\d)(?:{_UNIT_NUMBER}w\s*)?(?:{_UNIT_NUMBER}d\s*)?(?:{_UNIT_NUMBER}h\s*)?"
+    rf"(?:{_UNIT_NUMBER}m\s*)?(?:{_UNIT_NUMBER}s\s*)?",
+    re.IGNORECASE,
+)
 
 
 def parse_timedelta(s: str) -> datetime.timedelta:
     """Parse a timedelta string to datetime.timedelta.
 
-    Accepts 'H:MM:SS', 'H:MM:SS.f', 'D days, H:MM:SS', or 'D day, H:MM:SS'.
+    Accepts 'H:MM:SS', 'H:MM:SS.f', 'D days, H:MM:SS', or 'D day, H:MM:SS';
+    ISO-8601 durations in weeks, days, hours, minutes and seconds, e.g.
+    'P1DT2H30M' or 'PT45.5S'; and compact forms like '1h30m', '2d 3h' or '45s'.
 
     Args:
         s: Timedelta string to parse.
@@ -15,8 +38,75 @@ def parse_timedelta(s: str) -> datetime.timedelta:
         Parsed timedelta.
 
     Raises:
-        ValueError: If the string cannot be parsed.
+        ValueError: If the string cannot be parsed, or is an ISO-8601 duration in years or months.
+    """
+    days, hours, minutes, seconds = _parse_timedelta_parts(s)
+    return datetime.timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+
+def parse_timedeltas(values: Iterable[str]) -> array:
+    """Parse many timedelta strings, e.g. a runtime column, to total seconds.
+
+    Each string may be in any format parse_timedelta accepts. The array
+    supports the buffer protocol, so e.g. numpy.asarray can wrap it without
+    a copy.
+
+    Args:
+        values: Timedelta strings to parse.
+
+    Returns:
+        array.array: total seconds of each timedelta, as doubles ('d')
+
+    Raises:
+        ValueError: If a string cannot be parsed.
     """
+    seconds = array("d")
+    append = seconds.append
+    for s in values:
+        d, h, m, sec = _parse_timedelta_parts(s)
+        append(d * 86400 + h * 3600 + m * 60 + sec)
+    return seconds
+
+
+def _parse_timedelta_parts(s: str) -> tuple[float, float, float, float]:
+    """Parse a timedelta string to days, hours, minutes and seconds."""
+    if ":" in s:
+        return _parse_clock(s)
+    if "P" in s or "p" in s:
+        match = _ISO_REGEX.fullmatch(s)
+        if match:
+            return _signed_parts(match.group(1), *match.groups()[1:], comma=True)
+        if _ISO_CALENDAR_REGEX.match(s):
+            raise ValueError(f"Years and months aren't fixed durations: {s!r}")
+    else:
+        match = _COMPACT_REGEX.fullmatch(s)
+        if match:
+            return _signed_parts(match.group(1), *match.groups()[1:])
+    raise ValueError(f"Cannot parse timedelta string: {s.strip()!r}")
+
+
+def _signed_parts(
+    sign: str,
+    weeks: str | None,
+    days: str | None,
+    hours: str | None,
+    minutes: str | None,
+    seconds: str | None,
+    comma: bool = False,
+) -> tuple[float, float, float, float]:
+    """Convert matched unit amounts to days, hours, minutes and seconds."""
+
+    def num(x):
+        if not x:
+            return 0.0
+        return float(x.replace(",", ".") if comma else x)
+
+    parts = (num(weeks) * 7 + num(days), num(hours), num(minutes), num(seconds))
+    return tuple(-p for p in parts) if sign == "-" else parts  # type: ignore[return-value]
+
+
+def _parse_clock(s: str) -> tuple[float, float, float, float]:
+    """Parse the '[D days, ]H:MM:SS' format, as produced by str(datetime.timedelta)."""
     s = s.strip()
     days = 0
     if "day" in s:
@@ -29,4 +119,4 @@ def parse_timedelta(s: str) -> datetime.timedelta:
     hours = int(parts[0])
     minutes = int(parts[1])
     seconds = float(parts[2])
-    return datetime.timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+    return days, hours, minutes, seconds
@@ -1,8 +1,15 @@
 """Web-related utilities"""
 
 import re
+from collections.abc import Iterable
 
-__all__ = ["is_url", "has_scheme"]
+__all__ = [
+    "is_url",
+    "has_scheme",
+    "classify_paths",
+    "register_scheme_handler",
+    "get_scheme_handler",
+]
 
 # from Django 1.3.x
 # https://github.com/django/django/blob/6726d750979a7c29e0dd866b4ea367eef7c8a420/django/core/validators.py#L45-L51
@@ -17,6 +24,9 @@ _URL_REGEX = re.compile(
 )
 
 _SCHEME_REGEX = re.compile(r"^[a-zA-Z][a-zA-Z0-9+\-.]*://")
+# schemes accepted by _URL_REGEX; checked first so most strings skip the regex
+_URL_SCHEMES = frozenset(["http", "https", "ftp", "ftps"])
+_SCHEME_HANDLERS: dict[str, object] = {}
 
 
 def has_scheme(maybe_url: str) -> bool:
@@ -28,7 +38,8 @@ def has_scheme(maybe_url: str) -> bool:
     Returns:
         bool: whether string starts with a URI scheme
     """
-    return _SCHEME_REGEX.match(str(maybe_url)) is not None
+    maybe_url = str(maybe_url)
+    return "://" in maybe_url and _SCHEME_REGEX.match(maybe_url) is not None
 
 
 def is_url(maybe_url: str) -> bool:
@@ -40,4 +51,97 @@ def is_url(maybe_url: str) -> bool:
     Returns:
         bool: whether path appears to be a URL
     """
-    return _URL_REGEX.match(str(maybe_url)) is not None
+    maybe_url = str(maybe_url)
+    sep = maybe_url.find("://")
+    # casefold, like the regex's IGNORECASE, also maps e.g. U+017F to "s"
+    if not 3 <= sep <= 5 or maybe_url[:sep].casefold() not in _URL_SCHEMES:
+        return False
+    return _URL_REGEX.match(maybe_url) is not None
+
+
+def classify_paths(paths: Iterable[str]) -> list[str]:
+    """Label each path as a local path, a URL, or another URI with a scheme.
+
+    Args:
+        paths: paths to classify
+
+    Returns:
+        list[str]: for each path, 'url' if is_url accepts it, 'scheme' if it
+            otherwise starts with a URI scheme (e.g. s3://, gs://, file://),
+            else 'local'
+    """
+    labels = []
+    for path in paths:
+        path = str(path)
+        if "://" not in path:
+            labels.append("local")
+        elif is_url(path):
+            labels.append("url")
+        elif _SCHEME_REGEX.match(path):
+            labels.append("scheme")
+        else:
+            labels.append("local")
+    return labels
+
+
+def register_scheme_handler(scheme: str, handler: object | None) -> None:
+    """Register a handler for paths with a URI scheme, e.g. 's3' for s3://bucket/key.
+
+    mkabs, size and checksum hand paths with the scheme to the handler instead
+    of treating them as local paths. A handler may define any of:
+
+    - resolve(uri) -> str: normalized form of the URI, returned by mkabs
+      (without it, mkabs returns the URI unchanged)
+    - size(uri) -> int: size in bytes of the object, used by size
+    - checksum(uri, blocksize) -> str: md5 checksum of the object, used by checksum
+
+    file:// URIs always resolve to local paths and don't need a handler.
+
+    Args:
+        scheme: URI scheme the handler serves, without '://'
+        handler: object implementing the operations, or None to unregister
+    """
+    scheme = scheme.lower()
+    if handler is None:
+        _SCHEME_HANDLERS.pop(scheme, None)
+    else:
+        _SCHEME_HANDLERS[scheme] = handler
+
+
+def get_scheme_handler(scheme: str) -> object | None:
+    """Get the handler registered for a URI scheme.
+
+    Args:
+        scheme: URI scheme, without '://'
+
+    Returns:
+        object | None: the registered handler, or None if there isn't one
+    """
+    return _SCHEME_HANDLERS.get(scheme.lower())
+
+
+def _uri_scheme(path: object) -> str | None:
+    """Lowercase scheme of a URI, or None if the path doesn't start with one."""
+    if not isinstance(path, str):  # e.g. pathlib.Path
+        return None
+    sep = path.find("://")
+    if sep < 1 or not _SCHEME_REGEX.match(path):
+        return None
+    return path[:sep].lower()
+
+
+def _file_uri_to_path(uri: str) -> str:
+    """Local path for a file:// URI; raises ValueError if it names another host."""
+    from urllib.parse import unquote
+
+    host, _, path = uri[len("file://") :].partition("/")
+    if host and host.lower() != "localhost":
+        raise ValueError(f"Not a local file URI: {uri}")
+    return unquote("/" + path)
+
+
+def _resolve_uri(uri: str, scheme: str) -> str:
+    handler = _SCHEME_HANDLERS.get(scheme)
+    if handler is None or not hasattr(handler, "resolve"):
+        return uri
+    return handler.resolve(uri)